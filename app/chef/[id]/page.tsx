@@ -26,17 +26,39 @@ export default async function ChefPage(props: PageProps) {
         notFound();
     }
 
-    // 2. Fetch Chef's Recipes
-    const { data: recipes, error: recipeError } = await supabase
-        .from('recipes')
-        .select(`
-            id, title, image_url, time, calories, is_recommended, chef_id
-        `)
-        .eq('chef_id', params.id)
-        .order('created_at', { ascending: false });
+    // 2. Fetch Chef's Recipes, from the shards precomputed by scripts/export_recipe_documents.py if they are current:
+    // same recipe count, and no recipe added or changed since the recipes they were built from
+    const [{ data: shards }, { data: latest, count }] = await Promise.all([
+        supabase
+            .from('chef_recipe_index')
+            .select('recipes, recipe_count, source_updated_at')
+            .eq('chef_id', params.id)
+            .order('shard'),
+        supabase
+            .from('recipes')
+            .select('updated_at', { count: 'exact' })
+            .eq('chef_id', params.id)
+            .order('updated_at', { ascending: false })
+            .limit(1),
+    ]);
 
-    if (recipeError) {
-        console.error('Recipe Fetch Error:', recipeError);
+    const fresh = !!shards?.length && count === shards[0].recipe_count && !!shards[0].source_updated_at
+        && (!latest?.length || new Date(latest[0].updated_at) <= new Date(shards[0].source_updated_at));
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    let recipes: any[] | null = fresh && shards ? shards.flatMap((s) => s.recipes) : null;
+    if (!recipes) {
+        const { data, error: recipeError } = await supabase
+            .from('recipes')
+            .select(`
+                id, title, image_url, time, calories, is_recommended, chef_id
+            `)
+            .eq('chef_id', params.id)
+            .order('created_at', { ascending: false });
+
+        if (recipeError) {
+            console.error('Recipe Fetch Error:', recipeError);
+        }
+        recipes = data;
     }
 
     // Map recipes to component props (adding missing chefName for card since we know the chef)
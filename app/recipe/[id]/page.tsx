@@ -39,23 +39,34 @@ export default async function RecipeDetailPage(props: PageProps) {
     // Fetch User
     const { data: { user } } = await supabaseServer.auth.getUser();
 
-    // Fetch recipe with all related data
-    const { data: recipe, error } = await supabase
-        .from('recipes')
-        .select(`
-            *,
-            chefs (name, image_url),
-            ingredients (name, amount, purchase_link),
-            steps (step_order, description)
-        `)
-        .eq('id', params.id)
-        .single();
+    // Precomputed by scripts/export_recipe_documents.py (same shape as the query below)
+    const { data: snapshot } = await supabase
+        .from('recipe_documents')
+        .select('doc, source_updated_at, recipes (like_count, updated_at)')
+        .eq('recipe_id', params.id)
+        .maybeSingle();
 
-    // Fetch Like Count
-    const { count: likeCount } = await supabase
-        .from('recipe_likes')
-        .select('*', { count: 'exact', head: true })
-        .eq('recipe_id', params.id);
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    const live = snapshot?.recipes as any;
+    // The document is only used if the recipe has not changed since it was exported
+    const fresh = snapshot && live && new Date(live.updated_at) <= new Date(snapshot.source_updated_at);
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    let recipe: any = fresh && snapshot ? { ...snapshot.doc, like_count: live.like_count } : null;
+    let error: unknown = null;
+
+    // Not exported yet, or changed since: fetch recipe with all related data
+    if (!recipe) {
+        ({ data: recipe, error } = await supabase
+            .from('recipes')
+            .select(`
+                *,
+                chefs (name, image_url),
+                ingredients (name, amount, purchase_link),
+                steps (step_order, description)
+            `)
+            .eq('id', params.id)
+            .single());
+    }
 
     // Check if liked/saved by user
     let isLiked = false;
@@ -91,6 +102,8 @@ export default async function RecipeDetailPage(props: PageProps) {
     const ingredients = recipe.ingredients as any[];
     // eslint-disable-next-line @typescript-eslint/no-explicit-any
     const chef = recipe.chefs as any;
+    // Maintained by triggers on recipe_likes (scripts/migration_indexes_counters.sql)
+    const likeCount: number = recipe.like_count ?? 0;
 
     // Helper to convert YouTube URL to Embed URL
     const getEmbedUrl = (url: string) => {
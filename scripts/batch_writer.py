@@ -0,0 +1,77 @@
+import time
+import threading
+
+
+class BatchWriter:
+    """Buffers items and writes them in bulk once `max_batch` are waiting or the oldest is `max_wait` seconds old.
+
+    `write_batch(items)` performs one bulk write and returns its result, which
+    is handed to `on_written(items, result)`. If a batch fails it is split in
+    half and each half retried, down to single items, so one bad item only
+    reaches `on_failed(item, error)` and never sinks the rest.
+    """
+
+    def __init__(self, write_batch, on_written, on_failed, max_batch=20, max_wait=5.0):
+        self.write_batch = write_batch
+        self.on_written = on_written
+        self.on_failed = on_failed
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max_wait
+        self.batches = 0
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer = threading.Thread(target=self._flush_when_stale, name='batch-writer', daemon=True)
+        self._timer.start()
+
+    def add(self, item):
+        with self._lock:
+            self._buffer.append(item)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if len(self._buffer) < self.max_batch:
+                return
+            items = self._take()
+        self._write(items)
+
+    def _take(self):
+        items = self._buffer
+        self._buffer = []
+        self._oldest = None
+        return items
+
+    def flush(self):
+        with self._lock:
+            items = self._take()
+        if items:
+            self._write(items)
+
+    def _flush_when_stale(self):
+        while not self._closed.wait(min(1.0, self.max_wait)):
+            with self._lock:
+                stale = self._oldest is not None and time.monotonic() - self._oldest >= self.max_wait
+                items = self._take() if stale else []
+            if items:
+                self._write(items)
+
+    def _write(self, items):
+        try:
+            result = self.write_batch(items)
+        except Exception as e:
+            if len(items) == 1:
+                self.on_failed(items[0], e)
+                return
+            mid = len(items) // 2
+            self._write(items[:mid])
+            self._write(items[mid:])
+            return
+        with self._lock:
+            self.batches += 1
+        self.on_written(items, result)
+
+    def close(self):
+        """Stops the timer and writes whatever is still buffered."""
+        self._closed.set()
+        self._timer.join()
+        self.flush()
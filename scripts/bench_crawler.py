@@ -0,0 +1,470 @@
+import os
+import sys
+import json
+import time
+import types
+import random
+import argparse
+import tempfile
+import threading
+import contextlib
+import statistics
+from collections import Counter, defaultdict
+
+# Offline throughput benchmark for crawl_channel.py.
+#
+# YouTube (yt-dlp listing and downloads, caption tracks), Gemini and Supabase
+# are replaced by in-process stand-ins with configurable latency and failure
+# rates, installed into sys.modules before crawl_channel is imported. Nothing
+# touches the network and no quota is spent.
+
+CHEF_ID = '00000000-0000-0000-0000-000000000001'
+
+RECIPE_RESPONSE = {
+    'title': '김치찌개',
+    'description': '벤치마크용 레시피',
+    'ingredients': [
+        {'name': '김치', 'amount': '1컵'},
+        {'name': '돼지고기 200g', 'amount': '200g'},
+        {'name': '진간장', 'amount': '1큰술'},
+        {'name': '다진 마늘', 'amount': '1작은술'},
+    ],
+    'steps': [
+        {'order': 1, 'description': '김치와 돼지고기를 볶는다'},
+        {'order': 2, 'description': '물을 붓고 끓인다'},
+        {'order': 3, 'description': '간장으로 간을 맞춘다'},
+    ],
+    'time': '20분',
+    'calories': 450,
+    'nutrition': {'calories': 450, 'protein': '25g', 'fat': '20g', 'carbs': '15g'},
+    'is_recipe': True,
+}
+
+TRANSCRIPT_WORDS = ['음', '오늘은', '김치찌개를', '만들어', '볼게요', '김치를', '먼저', '볶아', '주시고요', '물을', '붓고', '끓여', '주세요', '[음악]']
+
+
+class BenchStats:
+    """Request counts per backend call and simulated latencies, shared by every stand-in."""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.stage_times = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.requests[name] += 1
+
+    def time_stage(self, name, seconds):
+        with self._lock:
+            self.stage_times[name].append(seconds)
+
+
+def _sleep(latency, jitter=0.3):
+    if latency > 0:
+        time.sleep(max(0.0, random.gauss(latency, latency * jitter)))
+
+
+class TransientError(Exception):
+    """Looks like a Gemini 503 to rate_limit.classify_error, so it is retried."""
+
+    code = 503
+
+
+def build_fakes(config, stats):
+    """Returns {module name: module} stand-ins for everything crawl_channel imports from the outside."""
+    fakes = {}
+
+    # dotenv: the benchmark sets the environment itself
+    dotenv = types.ModuleType('dotenv')
+    dotenv.load_dotenv = lambda *args, **kwargs: False
+    fakes['dotenv'] = dotenv
+
+    # supabase: an in-memory table store plus the RPCs the crawler calls
+    supabase = types.ModuleType('supabase')
+    tables = {'chefs': [{'id': CHEF_ID, 'name': '벤치마크'}], 'recipes': [], 'ingredients': [], 'steps': []}
+    db_lock = threading.Lock()
+
+    class Result:
+        def __init__(self, data):
+            self.data = data
+
+    class Query:
+        def __init__(self, table):
+            self.table = table
+            self.filters = []
+            self.order_by = None
+            self.row_limit = None
+
+        def select(self, columns='*', **kwargs):
+            return self
+
+        def eq(self, column, value):
+            self.filters.append(lambda row: row.get(column) == value)
+            return self
+
+        def gt(self, column, value):
+            self.filters.append(lambda row: str(row.get(column)) > str(value))
+            return self
+
+        def order(self, column, desc=False):
+            self.order_by = (column, desc)
+            return self
+
+        def limit(self, count):
+            self.row_limit = count
+            return self
+
+        def execute(self):
+            stats.count(f'supabase.select.{self.table}')
+            _sleep(config.db_latency)
+            with db_lock:
+                rows = [dict(row) for row in tables[self.table] if all(f(row) for f in self.filters)]
+            if self.order_by:
+                column, desc = self.order_by
+                rows.sort(key=lambda row: str(row.get(column)), reverse=desc)
+            if self.row_limit is not None:
+                rows = rows[:self.row_limit]
+            return Result(rows)
+
+    def save_recipe(doc):
+        """Returns (recipe id, created); an existing video_id keeps its stored recipe."""
+        doc = dict(doc)
+        ingredients = doc.pop('ingredients', [])
+        steps = doc.pop('steps', [])
+        with db_lock:
+            for row in tables['recipes']:
+                if row.get('video_id') == doc.get('video_id'):
+                    return row['id'], False
+            doc['id'] = f"recipe-{len(tables['recipes']) + 1}"
+            tables['recipes'].append(doc)
+            tables['ingredients'].extend(dict(i, recipe_id=doc['id']) for i in ingredients)
+            tables['steps'].extend(dict(s, recipe_id=doc['id']) for s in steps)
+        return doc['id'], True
+
+    class Rpc:
+        def __init__(self, name, params):
+            self.name = name
+            self.params = params
+
+        def execute(self):
+            stats.count(f'supabase.rpc.{self.name}')
+            _sleep(config.db_latency)
+            if self.name == 'save_recipes':
+                rows = []
+                for d in self.params['docs']:
+                    recipe_id, created = save_recipe(d)
+                    rows.append({'video_id': d.get('video_id'), 'recipe_id': recipe_id, 'created': created})
+                return Result(rows)
+            if self.name == 'save_recipe':
+                recipe_id, created = save_recipe(self.params['doc'])
+                return Result(recipe_id if created else None)
+            raise ValueError(f"Unknown RPC: {self.name}")
+
+    class Client:
+        tables = None
+
+        def table(self, name):
+            return Query(name)
+
+        def rpc(self, name, params=None):
+            return Rpc(name, params or {})
+
+    Client.tables = tables
+    supabase.Client = Client
+    supabase.create_client = lambda url, key: Client()
+    fakes['supabase'] = supabase
+
+    # youtube_transcript_api: a configurable share of videos has Korean captions
+    yta = types.ModuleType('youtube_transcript_api')
+
+    class CouldNotRetrieveTranscript(Exception):
+        pass
+
+    class NoTranscriptFound(CouldNotRetrieveTranscript):
+        def __init__(self, video_id, languages=None, data=None):
+            super().__init__(video_id)
+
+    class TranscriptsDisabled(CouldNotRetrieveTranscript):
+        pass
+
+    class VideoUnavailable(CouldNotRetrieveTranscript):
+        pass
+
+    class Snippet:
+        def __init__(self, text):
+            self.text = text
+
+    class Transcript:
+        language_code = 'ko'
+        is_generated = True
+        is_translatable = False
+
+        def __init__(self, video_id):
+            self.video_id = video_id
+
+        def fetch(self):
+            stats.count('youtube.transcript.fetch')
+            _sleep(config.youtube_latency)
+            rng = random.Random(self.video_id)
+            words = [rng.choice(TRANSCRIPT_WORDS) for _ in range(config.transcript_words)]
+            return [Snippet(' '.join(words[i:i + 10])) for i in range(0, len(words), 10)]
+
+    class YouTubeTranscriptApi:
+        def list(self, video_id):
+            stats.count('youtube.transcript.list')
+            _sleep(config.youtube_latency)
+            if random.Random(video_id).random() >= config.transcript_ratio:
+                raise TranscriptsDisabled(video_id)
+            return [Transcript(video_id)]
+
+    for cls in (CouldNotRetrieveTranscript, NoTranscriptFound, TranscriptsDisabled, VideoUnavailable, YouTubeTranscriptApi):
+        setattr(yta, cls.__name__, cls)
+    fakes['youtube_transcript_api'] = yta
+
+    # yt_dlp: a flat channel listing and small audio downloads
+    yt_dlp = types.ModuleType('yt_dlp')
+
+    class YoutubeDL:
+        def __init__(self, opts):
+            self.opts = opts
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=False, process=True):
+            stats.count('youtube.listing')
+            _sleep(config.youtube_latency)
+            entries = (
+                {'_type': 'url', 'ie_key': 'Youtube', 'id': f'bench{i:06d}', 'title': f'벤치마크 영상 {i}',
+                 'url': f'https://www.youtube.com/watch?v=bench{i:06d}', 'duration': 300}
+                for i in range(config.videos)
+            )
+            return {'_type': 'playlist', 'webpage_url': url, 'entries': entries}
+
+        def download(self, urls):
+            stats.count('youtube.download')
+            _sleep(config.download_latency)
+            video_id = urls[0].rsplit('=', 1)[-1]
+            path = self.opts['outtmpl'].replace('%(ext)s', 'webm')
+            with open(path.replace('%(id)s', video_id), 'wb') as f:
+                f.write(os.urandom(config.audio_kb * 1024))
+
+    yt_dlp.YoutubeDL = YoutubeDL
+    fakes['yt_dlp'] = yt_dlp
+
+    # google.generativeai: file uploads with a processing delay, and extraction calls
+    google = types.ModuleType('google')
+    google.__path__ = []
+    genai = types.ModuleType('google.generativeai')
+    uploads = {}
+
+    class State:
+        def __init__(self, name):
+            self.name = name
+
+    class File:
+        def __init__(self, name, state, display_name=''):
+            self.name = name
+            self.state = State(state)
+            self.display_name = display_name
+
+    def upload_file(path=None, mime_type=None, display_name=''):
+        stats.count('gemini.upload_file')
+        _sleep(config.gemini_latency / 2)
+        name = f'files/{len(uploads) + 1}'
+        uploads[name] = time.monotonic()
+        return File(name, 'PROCESSING', display_name)
+
+    def get_file(name):
+        stats.count('gemini.get_file')
+        ready = time.monotonic() - uploads.get(name, 0) >= config.upload_processing
+        return File(name, 'ACTIVE' if ready else 'PROCESSING')
+
+    def delete_file(name):
+        stats.count('gemini.delete_file')
+        uploads.pop(getattr(name, 'name', name), None)
+
+    class Usage:
+        def __init__(self, prompt_tokens, response_tokens):
+            self.prompt_token_count = prompt_tokens
+            self.candidates_token_count = response_tokens
+
+    class Response:
+        def __init__(self, text, contents):
+            self.text = text
+            # Roughly what Gemini reports; uploaded audio counts ~32 tokens per second
+            parts = contents if isinstance(contents, list) else [contents]
+            prompt_tokens = sum(len(p) // 2 if isinstance(p, str) else 300 * 32 for p in parts)
+            self.usage_metadata = Usage(prompt_tokens, len(text) // 2)
+
+    class GenerativeModel:
+        def __init__(self, model_name, **kwargs):
+            self.model_name = model_name
+
+        def generate_content(self, contents, generation_config=None, **kwargs):
+            stats.count(f'gemini.generate_content.{self.model_name}')
+            _sleep(config.gemini_latency)
+            roll = random.random()
+            if roll < config.gemini_failure_rate:
+                raise TransientError('503 Service Unavailable (simulated)')
+            if roll < config.gemini_failure_rate + config.bad_json_rate and 'flash' not in self.model_name:
+                # Valid JSON missing required fields, to exercise the repair pass
+                return Response(json.dumps({'title': RECIPE_RESPONSE['title'], 'is_recipe': True}, ensure_ascii=False), contents)
+            return Response(json.dumps(RECIPE_RESPONSE, ensure_ascii=False), contents)
+
+    genai.configure = lambda **kwargs: None
+    genai.GenerationConfig = lambda **kwargs: dict(kwargs)
+    genai.GenerativeModel = GenerativeModel
+    genai.upload_file = upload_file
+    genai.get_file = get_file
+    genai.delete_file = delete_file
+    genai.list_files = lambda: []
+    google.generativeai = genai
+    fakes['google'] = google
+    fakes['google.generativeai'] = genai
+
+    return fakes
+
+
+STAGE_FUNCTIONS = ('stage_transcript', 'stage_audio', 'stage_upload', 'stage_extract', 'stage_save')
+
+
+def _timed(func, name, stats):
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.time_stage(name, time.perf_counter() - started)
+    return wrapper
+
+
+def run_once(crawl_channel, config, workers, stats, extra_args):
+    """One crawl of config.videos fake videos; returns the measured numbers."""
+    import clients
+    import rate_limit
+
+    # Fresh limiters and an empty DB for every configuration
+    rate_limit._limiters.clear()
+    clients.get_supabase().tables['recipes'].clear()
+
+    originals = {name: getattr(crawl_channel, name) for name in STAGE_FUNCTIONS}
+    for name, func in originals.items():
+        setattr(crawl_channel, name, _timed(func, name[len('stage_'):], stats))
+
+    argv = ['https://www.youtube.com/@bench/videos', '--chef-id', CHEF_ID, '--limit', str(config.videos),
+            '--workers', str(workers), '--no-cache'] + extra_args
+    args = crawl_channel.build_parser().parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(sys.stdout if config.verbose else devnull):
+            summary = crawl_channel.run_crawl(args)
+    finally:
+        for name, func in originals.items():
+            setattr(crawl_channel, name, func)
+    elapsed = time.perf_counter() - started
+
+    processed = summary['success'] + summary['skip'] + summary['fail']
+    return {
+        'workers': workers,
+        'videos': config.videos,
+        'elapsed': round(elapsed, 2),
+        'videos_per_min': round(processed / elapsed * 60, 1) if elapsed else 0,
+        'success': summary['success'],
+        'skip': summary['skip'],
+        'fail': summary['fail'],
+        'retries': {name: limiter.retries for name, limiter in rate_limit._limiters.items()},
+        'tokens': summary['metrics']['tokens'],
+        'cost_usd': summary['metrics']['cost_usd'],
+        'stages': {
+            name: {
+                'count': len(times),
+                'mean_ms': round(statistics.mean(times) * 1000, 1),
+                'p95_ms': round((statistics.quantiles(times, n=20)[18] if len(times) > 1 else times[0]) * 1000, 1),
+                'max_ms': round(max(times) * 1000, 1),
+            }
+            for name, times in stats.stage_times.items()
+        },
+        'requests': dict(sorted(stats.requests.items())),
+    }
+
+
+def print_result(result):
+    print(f"\n⚙️  workers={result['workers']}: {result['videos']} videos in {result['elapsed']}s "
+          f"→ {result['videos_per_min']} videos/min "
+          f"(success {result['success']}, skipped {result['skip']}, failed {result['fail']})")
+    print(f"    {'Stage':<12} {'Calls':>6} {'Mean ms':>9} {'p95 ms':>9} {'Max ms':>9}")
+    for name in ('transcript', 'audio', 'upload', 'extract', 'save'):
+        stage = result['stages'].get(name)
+        if stage:
+            print(f"    {name:<12} {stage['count']:>6} {stage['mean_ms']:>9} {stage['p95_ms']:>9} {stage['max_ms']:>9}")
+    print(f"    Gemini cost ≈ ${result['cost_usd']} (" + ', '.join(f"{k}={v}" for k, v in result['tokens'].items()) + ")")
+    print("    Requests: " + ', '.join(f"{name}={count}" for name, count in result['requests'].items()))
+    retries = {name: n for name, n in result['retries'].items() if n}
+    if retries:
+        print("    Retries: " + ', '.join(f"{name}={n}" for name, n in retries.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the crawler pipeline offline against local YouTube, Gemini and Supabase stand-ins',
+        epilog='Unknown arguments (e.g. --ai-workers 8 --batch-size 50) are passed to crawl_channel.py.',
+    )
+    parser.add_argument('--videos', type=int, default=100, help='Videos in the fake channel')
+    parser.add_argument('--workers', type=int, nargs='+', default=[4], help='Stage concurrency to compare, e.g. 2 4 8')
+    parser.add_argument('--transcript-ratio', type=float, default=0.7, help='Share of videos with Korean captions')
+    parser.add_argument('--transcript-words', type=int, default=600, help='Words per caption track')
+    parser.add_argument('--gemini-latency', type=float, default=2.0, help='Seconds per Gemini generate call')
+    parser.add_argument('--gemini-failure-rate', type=float, default=0.02, help='Share of Gemini calls failing with a retryable 503')
+    parser.add_argument('--bad-json-rate', type=float, default=0.02, help='Share of responses that need the repair pass')
+    parser.add_argument('--upload-processing', type=float, default=1.0, help='Seconds until an uploaded file is ACTIVE')
+    parser.add_argument('--youtube-latency', type=float, default=0.2, help='Seconds per listing/caption request')
+    parser.add_argument('--download-latency', type=float, default=1.5, help='Seconds per audio download')
+    parser.add_argument('--audio-kb', type=int, default=64, help='Size of each fake audio file')
+    parser.add_argument('--db-latency', type=float, default=0.05, help='Seconds per Supabase request')
+    parser.add_argument('--gemini-rpm', type=float, help='Model a Gemini quota (default: unlimited)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON, e.g. to compare runs')
+    parser.add_argument('--verbose', action='store_true', help='Show the crawler output')
+    config, extra_args = parser.parse_known_args(argv)
+
+    random.seed(config.seed)
+    stats = BenchStats()
+    sys.modules.update(build_fakes(config, stats))
+
+    workdir = tempfile.mkdtemp(prefix='bench-crawler-')
+    os.environ.update({
+        'NEXT_PUBLIC_SUPABASE_URL': 'http://bench.invalid',
+        'NEXT_PUBLIC_SUPABASE_ANON_KEY': 'bench',
+        'GEMINI_API_KEY': 'bench',
+        'CRAWLER_CACHE_DIR': workdir,
+        'GEMINI_RPM': str(config.gemini_rpm or 1e6),
+        'GEMINI_TPM': '1e12',
+        'YOUTUBE_RPS': '1e6',
+        'SUPABASE_RPS': '1e6',
+    })
+    import crawl_channel
+
+    print(f"🏁 Benchmarking {config.videos} videos, workers {config.workers} (scratch dir {workdir})")
+    results = []
+    for workers in config.workers:
+        stats.requests.clear()
+        stats.stage_times.clear()
+        result = run_once(crawl_channel, config, workers, stats, extra_args)
+        print_result(result)
+        results.append(result)
+
+    if config.json:
+        with open(config.json, 'w', encoding='utf-8') as f:
+            json.dump({'settings': vars(config), 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 Results: {config.json}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
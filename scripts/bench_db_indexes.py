@@ -0,0 +1,276 @@
+import os
+import json
+import time
+import random
+import argparse
+import statistics
+
+try:
+    import psycopg
+    from psycopg.conninfo import make_conninfo
+except ImportError:  # optional: only this benchmark talks to Postgres directly
+    psycopg = None
+
+# Query-plan and latency benchmark for migration_indexes_counters.sql.
+#
+# Creates a scratch database on a local Postgres, loads a synthetic catalog
+# into the tables as supabase_schema.sql and the likes/saves migrations
+# defined them, times the queries the site and scripts make, applies the
+# migration file itself and times them again.
+
+MIGRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migration_indexes_counters.sql')
+
+# Tables as they were before the migration: primary keys, foreign keys and unique constraints only
+BASE_SCHEMA = """
+create table chefs (
+  id uuid default gen_random_uuid() primary key,
+  name text not null,
+  image_url text not null,
+  created_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+create table recipes (
+  id uuid default gen_random_uuid() primary key,
+  title text not null,
+  chef_id uuid references chefs(id) on delete cascade not null,
+  image_url text not null,
+  time text not null,
+  calories integer not null,
+  video_url text not null,
+  video_id text,
+  created_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+create unique index recipes_video_id_key on recipes (video_id);
+create table ingredients (
+  id uuid default gen_random_uuid() primary key,
+  recipe_id uuid references recipes(id) on delete cascade not null,
+  name text not null,
+  amount text not null,
+  purchase_link text not null
+);
+create table steps (
+  id uuid default gen_random_uuid() primary key,
+  recipe_id uuid references recipes(id) on delete cascade not null,
+  step_order integer not null,
+  description text not null
+);
+create table recipe_likes (
+  id uuid default gen_random_uuid() primary key,
+  user_id uuid not null,
+  recipe_id uuid references recipes(id) on delete cascade not null,
+  created_at timestamp with time zone default timezone('utc'::text, now()) not null,
+  unique(user_id, recipe_id)
+);
+create table recipe_saves (
+  id uuid default gen_random_uuid() primary key,
+  user_id uuid not null,
+  recipe_id uuid references recipes(id) on delete cascade not null,
+  created_at timestamp with time zone default timezone('utc'::text, now()) not null,
+  unique(user_id, recipe_id)
+);
+"""
+
+# (name, what it stands for, SQL before, SQL after, parameter kind)
+QUERIES = [
+    ('chef_recipes', 'chef page', "select id, title from recipes where chef_id = %s order by created_at desc", None, 'chef'),
+    ('latest_recipes', 'home page', "select id, title from recipes order by created_at desc limit 12", None, None),
+    ('recipe_ingredients', 'recipe page', "select name, amount, purchase_link from ingredients where recipe_id = %s", None, 'recipe'),
+    ('recipe_steps', 'recipe page', "select step_order, description from steps where recipe_id = %s order by step_order", None, 'recipe'),
+    ('ingredients_chunk', "relink .in_('recipe_id', chunk)",
+     "select id, name, purchase_link from ingredients where recipe_id = any(%s) order by id limit 1000", None, 'chunk'),
+    ('like_count', 'recipe page',
+     "select count(*) from recipe_likes where recipe_id = %s", "select like_count from recipes where id = %s", 'recipe'),
+    ('popular', 'top 12 by likes',
+     "select recipe_id, count(*) from recipe_likes group by recipe_id order by count(*) desc limit 12",
+     "select id, like_count from recipes order by like_count desc limit 12", None),
+    ('like', 'insert into recipe_likes (rolled back)',
+     "insert into recipe_likes (user_id, recipe_id) values (gen_random_uuid(), %s)", None, 'recipe'),
+    ('delete_recipe', 'cascade to ingredients/steps (rolled back)', "delete from recipes where id = %s", None, 'recipe'),
+]
+
+
+def load_data(conn, config):
+    """Synthetic catalog, generated server-side. Likes and saves are skewed towards a few popular recipes."""
+    steps = [
+        ("chefs", """
+            create table bench_chefs as select g as n, gen_random_uuid() as id from generate_series(0, %(chefs)s - 1) g;
+            insert into chefs (id, name, image_url) select id, 'Chef ' || n, '' from bench_chefs;
+        """),
+        ("recipes", """
+            create table bench_recipes as
+              select g as n, gen_random_uuid() as id, g %% %(chefs)s as chef_n from generate_series(0, %(recipes)s - 1) g;
+            insert into recipes (id, title, chef_id, image_url, time, calories, video_url, video_id, created_at)
+              select r.id, 'Recipe ' || r.n, c.id, '', '20분', 400,
+                     'https://www.youtube.com/watch?v=' || lpad(r.n::text, 11, '0'), lpad(r.n::text, 11, '0'),
+                     now() - r.n * interval '1 minute'
+              from bench_recipes r join bench_chefs c on c.n = r.chef_n
+              order by random();
+        """),
+        ("ingredients", """
+            insert into ingredients (recipe_id, name, amount, purchase_link)
+              select r.id, 'ingredient ' || i, '1큰술', '' from bench_recipes r, generate_series(1, %(ingredients)s) i
+              order by random();
+        """),
+        ("steps", """
+            insert into steps (recipe_id, step_order, description)
+              select r.id, i, 'step ' || i from bench_recipes r, generate_series(1, %(steps)s) i
+              order by random();
+        """),
+        ("likes", """
+            insert into recipe_likes (user_id, recipe_id)
+              select gen_random_uuid(), r.id
+              from (select floor(%(recipes)s * power(random(), 3))::int as n from generate_series(1, %(likes)s)) p
+              join bench_recipes r using (n)
+              on conflict do nothing;
+        """),
+        ("saves", """
+            insert into recipe_saves (user_id, recipe_id)
+              select gen_random_uuid(), r.id
+              from (select floor(%(recipes)s * power(random(), 3))::int as n from generate_series(1, %(saves)s)) p
+              join bench_recipes r using (n)
+              on conflict do nothing;
+        """),
+    ]
+    params = {key: getattr(config, key) for key in ('chefs', 'recipes', 'ingredients', 'steps', 'likes', 'saves')}
+    for name, sql in steps:
+        started = time.perf_counter()
+        for statement in filter(str.strip, sql.split(';')):
+            conn.execute(statement, params)
+        conn.commit()
+        print(f"  Loaded {name} in {time.perf_counter() - started:.1f}s")
+    conn.execute("analyze")
+    conn.commit()
+
+
+def sample_params(conn, kind, count):
+    if kind is None:
+        return [()] * count
+    if kind == 'chef':
+        ids = [row[0] for row in conn.execute("select id from bench_chefs order by random() limit %s", (count,))]
+        return [(random.choice(ids),) for _ in range(count)]
+    ids = [row[0] for row in conn.execute("select id from bench_recipes order by random() limit %s", (count * 100,))]
+    if kind == 'chunk':
+        return [(random.sample(ids, 100),) for _ in range(count)]
+    return [(random.choice(ids),) for _ in range(count)]
+
+
+def summarize_plan(node):
+    """'Limit > Index Scan using recipes_created_at_idx' style summary of an EXPLAIN (FORMAT JSON) plan."""
+    label = node['Node Type']
+    if node.get('Index Name'):
+        label += f" using {node['Index Name']}"
+    elif node.get('Relation Name'):
+        label += f" on {node['Relation Name']}"
+    children = [summarize_plan(child) for child in node.get('Plans', [])]
+    if not children:
+        return label
+    return f"{label} > {' + '.join(children)}" if len(children) > 1 else f"{label} > {children[0]}"
+
+
+def measure(conn, sql, params_list):
+    """Median/p95 latency over params_list, plus the plan and buffer count of the first run. Writes are rolled back."""
+    rows = conn.execute("explain (analyze, buffers, format json) " + sql, params_list[0]).fetchone()[0]
+    conn.rollback()
+    plan = rows[0]['Plan']
+
+    times = []
+    for params in params_list:
+        started = time.perf_counter()
+        cursor = conn.execute(sql, params)
+        if cursor.description:
+            cursor.fetchall()
+        times.append(time.perf_counter() - started)
+        conn.rollback()
+    return {
+        'p50_ms': round(statistics.median(times) * 1000, 3),
+        'p95_ms': round((statistics.quantiles(times, n=20)[18] if len(times) > 1 else times[0]) * 1000, 3),
+        'buffers': plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0),
+        'plan': summarize_plan(plan),
+    }
+
+
+def run_queries(conn, config, phase):
+    results = {}
+    for name, _, before, after, kind in QUERIES:
+        sql = (after or before) if phase == 'after' else before
+        results[name] = measure(conn, sql, sample_params(conn, kind, config.repeat))
+    return results
+
+
+def print_report(before, after):
+    print("\n" + "=" * 100)
+    print(f"{'Query':<20} {'Before p50':>11} {'After p50':>10} {'Speedup':>8} {'Buffers':>16}   Used by")
+    print("-" * 100)
+    for name, used_by, *_ in QUERIES:
+        b, a = before[name], after[name]
+        speedup = f"{b['p50_ms'] / a['p50_ms']:.1f}x" if a['p50_ms'] else '-'
+        print(f"{name:<20} {b['p50_ms']:>9}ms {a['p50_ms']:>8}ms {speedup:>8} {b['buffers']:>7} → {a['buffers']:<6}   {used_by}")
+    print("-" * 100)
+    for name, *_ in QUERIES:
+        print(f"{name}")
+        print(f"  before: {before[name]['plan']}")
+        print(f"  after:  {after[name]['plan']}")
+    print("=" * 100)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare query plans and latency before and after migration_indexes_counters.sql')
+    parser.add_argument('--dsn', default=os.getenv('BENCH_DATABASE_URL', 'postgresql://postgres@localhost/postgres'),
+                        help='Local Postgres to create the scratch database on (default: $BENCH_DATABASE_URL)')
+    parser.add_argument('--database', default='recipe_index_bench', help='Scratch database, dropped and recreated')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch database afterwards')
+    parser.add_argument('--chefs', type=int, default=50)
+    parser.add_argument('--recipes', type=int, default=50000)
+    parser.add_argument('--ingredients', type=int, default=10, help='Ingredients per recipe')
+    parser.add_argument('--steps', type=int, default=8, help='Steps per recipe')
+    parser.add_argument('--likes', type=int, default=200000)
+    parser.add_argument('--saves', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=30, help='Timed runs per query')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    config = parser.parse_args(argv)
+
+    if psycopg is None:
+        print("❌ This benchmark needs psycopg: pip install 'psycopg[binary]'")
+        return None
+
+    random.seed(config.seed)
+    with psycopg.connect(config.dsn, autocommit=True) as admin:
+        admin.execute(f'drop database if exists "{config.database}"')
+        admin.execute(f'create database "{config.database}"')
+
+    try:
+        with psycopg.connect(make_conninfo(config.dsn, dbname=config.database)) as conn:
+            conn.execute(BASE_SCHEMA)
+            conn.commit()
+            print(f"🏁 Loading {config.recipes} recipes from {config.chefs} chefs into {config.database}...")
+            load_data(conn, config)
+
+            print("⏱️ Before migration...")
+            before = run_queries(conn, config, 'before')
+
+            started = time.perf_counter()
+            with open(MIGRATION, encoding='utf-8') as f:
+                conn.execute(f.read())
+            conn.commit()
+            conn.execute("analyze")
+            conn.commit()
+            print(f"🛠️ Applied {os.path.basename(MIGRATION)} in {time.perf_counter() - started:.1f}s")
+
+            print("⏱️ After migration...")
+            after = run_queries(conn, config, 'after')
+    finally:
+        if not config.keep:
+            with psycopg.connect(config.dsn, autocommit=True) as admin:
+                admin.execute(f'drop database if exists "{config.database}"')
+
+    print_report(before, after)
+
+    if config.json:
+        with open(config.json, 'w', encoding='utf-8') as f:
+            json.dump({'settings': vars(config), 'before': before, 'after': after}, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 Results: {config.json}")
+    return before, after
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+from ingredient_index import IngredientIndex
+
+# Query latency benchmark for ingredient_index.py on synthetic recipes.
+#
+# Ingredient names follow a Zipf-like distribution over common Korean
+# ingredients plus a long tail, with quantities and asides mixed into some
+# names the way the crawler's extractions have them. Nothing touches Supabase.
+
+COMMON = [
+    '간장', '진간장', '다진 마늘', '설탕', '참기름', '대파', '양파', '소금', '후추', '고춧가루',
+    '고추장', '된장', '식용유', '물', '계란', '달걀', '깨', '청양고추', '돼지고기', '소고기',
+    '닭고기', '두부', '김치', '감자', '당근', '애호박', '버섯', '표고버섯', '느타리버섯', '쪽파',
+    '생강', '맛술', '올리고당', '물엿', '식초', '굴소스', '멸치액젓', '새우젓', '참치액', '버터',
+    '우유', '밀가루', '부침가루', '전분', '떡', '어묵', '라면', '밥', '김', '오이',
+    '배추', '무', '콩나물', '숙주', '시금치', '깻잎', '상추', '베이컨', '햄', '스팸',
+    '치즈', '모짜렐라 치즈', '토마토', '파스타면', '새우', '오징어', '고등어', '연어', '참치캔', '돼지고기 앞다리살',
+]
+DECORATIONS = ['', '', '', ' 1큰술', ' 2개', ' 300g', ' 약간', ' (선택)', ' 1/2개']
+# Rare names are made of syllables, since digits would be stripped as quantities
+SYLLABLES = '가나다라마바사아자차카타파하고노도로모보소오조초코토포호구누두루무부수우주추'
+
+
+def make_vocabulary(tail):
+    rare = (a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES)
+    names = COMMON + [next(rare) for _ in range(tail)]
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(names))]
+    return names, weights
+
+
+def make_recipes(count, names, weights, rng, start=0):
+    for n in range(start, start + count):
+        picked = set(rng.choices(names, weights, k=rng.randint(5, 15)))
+        yield f'recipe-{n}', f'레시피 {n}', [name + rng.choice(DECORATIONS) for name in picked]
+
+
+def percentile(times, q):
+    return sorted(times)[min(len(times) - 1, int(len(times) * q))]
+
+
+def run_size(size, config, workdir):
+    rng = random.Random(config.seed)
+    names, weights = make_vocabulary(config.tail)
+    path = os.path.join(workdir, f'index-{size}.sqlite3')
+
+    recipes = list(make_recipes(size, names, weights, rng))
+    index = IngredientIndex(path)
+    started = time.perf_counter()
+    for recipe_id, title, ingredients in recipes:
+        index.add(recipe_id, title, ingredients)
+    index.save()
+    build_s = time.perf_counter() - started
+    index.close()
+
+    started = time.perf_counter()
+    index = IngredientIndex(path)
+    load_s = time.perf_counter() - started
+
+    # Incremental: a crawl's worth of new recipes, plus a few re-extracted ones
+    new_recipes = list(make_recipes(config.incremental, names, weights, rng, start=size))
+    changed_recipes = list(make_recipes(10, names, weights, rng))
+    started = time.perf_counter()
+    for recipe_id, title, ingredients in new_recipes + changed_recipes:
+        index.add(recipe_id, title, ingredients)
+    index.save()
+    update_s = time.perf_counter() - started
+
+    pantries = [rng.sample(names[:len(COMMON)], rng.randint(3, 8)) for _ in range(config.queries)]
+    result = {
+        'recipes': size,
+        'terms': len(index.postings),
+        'file_mb': round(os.path.getsize(path) / 1e6, 2),
+        'build_s': round(build_s, 2),
+        'load_s': round(load_s, 3),
+        'incremental_ms': round(update_s * 1000, 1),
+    }
+    # The first query after loading or updating rebuilds the cached bitmaps (and the bigram table)
+    started = time.perf_counter()
+    index.search(pantries[0], config.limit)
+    result['first_query_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    for mode, partial in (('exact', False), ('partial', True)):
+        times = []
+        for have in pantries:
+            started = time.perf_counter()
+            index.search(have, config.limit, partial=partial)
+            times.append(time.perf_counter() - started)
+        result[mode] = {
+            'p50_ms': round(statistics.median(times) * 1000, 2),
+            'p95_ms': round(percentile(times, 0.95) * 1000, 2),
+            'max_ms': round(max(times) * 1000, 2),
+        }
+    result['example'] = {'have': pantries[0], 'top': index.search(pantries[0], 3)}
+    index.close()
+    return result
+
+
+def print_result(result):
+    print(f"\n📚 {result['recipes']} recipes, {result['terms']} ingredients: index {result['file_mb']} MB, "
+          f"built in {result['build_s']}s, loaded in {result['load_s']}s, "
+          f"+{result['incremental_ms']}ms for an incremental update, first query {result['first_query_ms']}ms")
+    print(f"    {'Match':<8} {'p50 ms':>8} {'p95 ms':>8} {'Max ms':>8}")
+    for mode in ('exact', 'partial'):
+        stats = result[mode]
+        print(f"    {mode:<8} {stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['max_ms']:>8}")
+    example = result['example']
+    print(f"    e.g. {', '.join(example['have'])}:")
+    for r in example['top']:
+        print(f"      {r['title']} ({r['matched']}/{r['total']}, {r['coverage']:.0%}) missing {', '.join(r['missing']) or '-'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark ingredient_index.py build, update and query latency on synthetic recipes')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000], help='Recipe counts to benchmark')
+    parser.add_argument('--tail', type=int, default=3000, help='Rare ingredient names besides the common ones')
+    parser.add_argument('--queries', type=int, default=200, help='Random pantries (3-8 common ingredients) per size')
+    parser.add_argument('--incremental', type=int, default=100, help='New recipes added after the build')
+    parser.add_argument('--limit', type=int, default=20, help='Results per query')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    config = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-ingredient-index-')
+    print(f"🏁 Benchmarking sizes {config.sizes} (scratch dir {workdir})")
+    results = []
+    for size in config.sizes:
+        result = run_size(size, config, workdir)
+        print_result(result)
+        results.append(result)
+
+    if config.json:
+        with open(config.json, 'w', encoding='utf-8') as f:
+            json.dump({'settings': vars(config), 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 Results: {config.json}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
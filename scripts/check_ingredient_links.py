@@ -1,17 +1,7 @@
-
-import os
-import sys
-from dotenv import load_dotenv
-from supabase import create_client, Client
-
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from clients import get_supabase
 
 def main():
+    supabase = get_supabase()
     # 1. Get Chef IDs
     print("Fetching Chef IDs...")
     chefs = supabase.table('chefs').select('id, name').execute()
@@ -0,0 +1,27 @@
+import rate_limit
+from clients import get_supabase
+
+
+def fetch_chefs():
+    """Every chef as {'id', 'name'}."""
+    return rate_limit.call('supabase', get_supabase().table('chefs').select('id, name').execute).data
+
+
+def match_chefs(value, chefs):
+    """Chefs whose ID is value or whose name contains it."""
+    return [c for c in chefs if c['id'] == value or value in c['name']]
+
+
+def resolve_chefs(chef_args, all_chefs=False):
+    """Turns --chef values (UUID or name fragment) into [{'id', 'name'}]."""
+    chefs = fetch_chefs()
+    if all_chefs:
+        return chefs
+
+    resolved = []
+    for value in chef_args:
+        matches = match_chefs(value, chefs)
+        if not matches:
+            print(f"⚠️ Chef not found: {value}")
+        resolved.extend(m for m in matches if m not in resolved)
+    return resolved
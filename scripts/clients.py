@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+
+# Shared, lazily created clients for everything in scripts/.
+#
+# Nothing heavy is imported or connected at import time: .env.local is read
+# on first use, and supabase, google.generativeai and requests are imported
+# only when a script actually asks for that client. Each client is created
+# once per process and reused.
+
+ENV_FILE = '.env.local'
+
+_lock = threading.RLock()
+_config_loaded = False
+_supabase = None
+_genai = None
+_models = {}
+_http_session = None
+
+
+def load_config():
+    """Reads .env.local once per process. Variables already set in the environment win."""
+    global _config_loaded
+    with _lock:
+        if not _config_loaded:
+            from dotenv import load_dotenv
+            load_dotenv(ENV_FILE)
+            _config_loaded = True
+
+
+def require_env(*names):
+    """Returns the values of the named variables, exiting with a message if any is missing."""
+    load_config()
+    values = [os.getenv(name) for name in names]
+    missing = [name for name, value in zip(names, values) if not value]
+    if missing:
+        print(f"❌ Error: Missing environment variables ({', '.join(missing)}). Check {ENV_FILE}")
+        sys.exit(1)
+    return values
+
+
+def get_supabase():
+    global _supabase
+    with _lock:
+        if _supabase is None:
+            url, key = require_env('NEXT_PUBLIC_SUPABASE_URL', 'NEXT_PUBLIC_SUPABASE_ANON_KEY')
+            from supabase import create_client
+            _supabase = create_client(url, key)
+        return _supabase
+
+
+def get_genai():
+    """The google.generativeai module, configured with GEMINI_API_KEY."""
+    global _genai
+    with _lock:
+        if _genai is None:
+            (api_key,) = require_env('GEMINI_API_KEY')
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            _genai = genai
+        return _genai
+
+
+def get_model(name):
+    with _lock:
+        if name not in _models:
+            _models[name] = get_genai().GenerativeModel(name)
+        return _models[name]
+
+
+def get_http_session(pool_size=10):
+    """A keep-alive requests.Session; pool_size only applies to the first call."""
+    global _http_session
+    with _lock:
+        if _http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            session.headers['User-Agent'] = 'Mozilla/5.0'
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _http_session = session
+        return _http_session
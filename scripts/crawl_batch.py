@@ -0,0 +1,298 @@
+import os
+import json
+import time
+import signal
+import argparse
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from chef_lookup import fetch_chefs, match_chefs
+from clients import load_config
+from crawl_cache import CACHE_DIR
+from crawl_journal import new_run_id
+
+BATCH_DIR = os.path.join(CACHE_DIR, 'batches')
+
+
+def load_manifest(path):
+    """Reads a JSON list of {"chef": name or UUID, "channel_url": ..., "limit": N, "incremental": bool}."""
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError("Manifest must be a JSON list")
+    for i, entry in enumerate(entries):
+        missing = [key for key in ('chef', 'channel_url') if not entry.get(key)]
+        if missing:
+            raise ValueError(f"Manifest entry {i}: missing {', '.join(missing)}")
+        entry.setdefault('limit', 100)
+        entry.setdefault('incremental', False)
+    return entries
+
+
+def resolve_chef(value, chefs):
+    """Matches a manifest chef (UUID or name fragment) to exactly one chef ID, or None."""
+    matches = match_chefs(value, chefs)
+    return matches[0]['id'] if len(matches) == 1 else None
+
+
+class ChannelState:
+    """Scheduling state of one manifest entry.
+
+    A channel is listed once by its first task; the videos not yet in the
+    DB are then handed out to crawl tasks in slices. An incremental channel
+    lists from its mark, so it runs as a single task that lists for itself.
+    """
+
+    def __init__(self, index, entry, chef_id):
+        self.index = index
+        self.entry = entry
+        self.chef_id = chef_id
+        self.videos = None  # new videos, once listed
+        self.next_video = 0
+        self.listed = 0
+        self.known = 0
+        self.in_flight = 0
+        self.failed = chef_id is None
+        self.results = []
+        self.errors = []
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def schedulable(self):
+        if self.failed:
+            return False
+        if self.entry['incremental'] or self.videos is None:
+            return not self.in_flight and not self.results
+        return self.next_video < len(self.videos)
+
+    def report(self):
+        totals = {key: sum(r[key] for r in self.results) for key in ('listed', 'success', 'skip', 'fail', 'pending')}
+        if self.videos is not None:
+            # Videos already in the DB were skipped before slicing; unscheduled ones are still pending
+            totals['listed'] = self.listed
+            totals['skip'] += self.known
+            totals['pending'] += len(self.videos) - self.next_video
+        return {
+            'chef': self.entry['chef'],
+            'chef_id': self.chef_id,
+            'channel_url': self.entry['channel_url'],
+            'slices': len(self.results),
+            **totals,
+            'errors': self.errors,
+            'runs': [r['run_id'] for r in self.results],
+            'elapsed': round((self.finished_at or time.time()) - self.started_at, 1) if self.started_at else 0,
+        }
+
+
+def _init_worker(processes):
+    # .env.local first, so a RATE_LIMIT_SCALE set there is scaled too
+    load_config()
+    # Every process gets an equal share of the global per-backend budgets (see rate_limit.get_limiter)
+    scale = float(os.getenv('RATE_LIMIT_SCALE', '1') or 1) * processes
+    os.environ['RATE_LIMIT_SCALE'] = str(scale)
+    # Ctrl-C is handled by the scheduler: running slices finish, nothing new starts
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def list_channel(task):
+    """Runs in a worker process: lists up to `limit` videos of one channel, logging to its file."""
+    import crawl_channel
+
+    with open(task['log_path'], 'a', encoding='utf-8') as log_file, \
+            contextlib.redirect_stdout(log_file), contextlib.redirect_stderr(log_file):
+        return crawl_channel.get_channel_videos(task['channel_url'], task['limit'])
+
+
+def crawl_slice(task):
+    """Runs in a worker process: one slice of one channel, logging to its own file."""
+    import crawl_channel
+
+    argv = [task['channel_url'], '--chef-id', task['chef_id'], '--no-sweep']
+    if task['incremental']:
+        argv += ['--limit', str(task['limit']), '--incremental']
+    else:
+        argv += ['--videos', task['videos_path'], '--no-known-check']
+    args = crawl_channel.build_parser().parse_args(argv + task['extra_args'])
+
+    with open(task['log_path'], 'a', encoding='utf-8') as log_file, \
+            contextlib.redirect_stdout(log_file), contextlib.redirect_stderr(log_file):
+        return crawl_channel.run_crawl(args)
+
+
+class KnownIds:
+    """Video IDs already in the DB, loaded once per batch (or once per chef with --dedup-scope chef)."""
+
+    def __init__(self, dedup_scope):
+        self.dedup_scope = dedup_scope
+        self._loaded = {}
+
+    def get(self, chef_id):
+        from crawl_channel import KnownVideos
+
+        key = chef_id if self.dedup_scope == 'chef' else None
+        if key not in self._loaded:
+            self._loaded[key] = KnownVideos.load(key)
+        return self._loaded[key]
+
+
+def pick_channel(channels):
+    """The schedulable channel with the fewest running slices; ties go to the least recently served."""
+    candidates = [c for c in channels if c.schedulable]
+    if not candidates:
+        return None
+    channel = min(candidates, key=lambda c: c.in_flight)
+    # Rotate so the next tie goes to someone else
+    channels.remove(channel)
+    channels.append(channel)
+    return channel
+
+
+def print_report(rows):
+    print("\n" + "=" * 90)
+    print(f"{'Chef':<12} {'Channel':<36} {'Slices':>6} {'Listed':>6} {'OK':>5} {'Skip':>5} {'Fail':>5} {'Left':>5} {'Time':>7}")
+    print("-" * 90)
+    for row in rows:
+        print(f"{row['chef'][:12]:<12} {row['channel_url'][-36:]:<36} {row['slices']:>6} {row['listed']:>6} "
+              f"{row['success']:>5} {row['skip']:>5} {row['fail']:>5} {row['pending']:>5} {row['elapsed']:>6}s")
+        for error in row['errors']:
+            print(f"  ❌ {error}")
+    print("-" * 90)
+    totals = {key: sum(row[key] for row in rows) for key in ('listed', 'success', 'skip', 'fail', 'pending')}
+    print(f"Total: {totals['listed']} listed | Success: {totals['success']} | Skipped: {totals['skip']} | "
+          f"Failed: {totals['fail']} | Not processed: {totals['pending']}")
+    print("=" * 90)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Crawl many channels from a manifest across a pool of worker processes',
+        epilog='Arguments after the known options (e.g. --workers 2 --audio-mode mono) are passed to crawl_channel.py.',
+    )
+    parser.add_argument('manifest', help='JSON list of {"chef", "channel_url", "limit", "incremental"} entries')
+    parser.add_argument('--processes', type=int, default=4, help='Worker processes (the rate budget is split between them)')
+    parser.add_argument('--slice-size', type=int, default=50, help='Videos per scheduled slice of a channel')
+    args, extra_args = parser.parse_known_args(argv)
+
+    try:
+        entries = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return None
+
+    try:
+        chefs = fetch_chefs()
+    except Exception as e:
+        print(f"❌ Failed to fetch chefs: {e}")
+        return None
+
+    import crawl_channel
+    from gemini_files import sweep_orphaned_uploads
+
+    crawl_args = crawl_channel.build_parser().parse_args(extra_args)
+    known_ids = KnownIds(crawl_args.dedup_scope)
+
+    batch_id = new_run_id()
+    batch_dir = os.path.join(BATCH_DIR, batch_id)
+    os.makedirs(batch_dir, exist_ok=True)
+    print(f"📦 Batch {batch_id}: {len(entries)} channels, {args.processes} processes (logs in {batch_dir})")
+
+    # Once for the whole batch rather than in every slice
+    swept = sweep_orphaned_uploads()
+    if swept:
+        print(f"🧹 Deleted {swept} orphaned Gemini uploads.")
+
+    channels = []
+    for i, entry in enumerate(entries):
+        channel = ChannelState(i, entry, resolve_chef(entry['chef'], chefs))
+        if channel.chef_id is None:
+            channel.errors.append(f"Chef not found or ambiguous: {entry['chef']}")
+        channels.append(channel)
+    by_index = list(channels)
+
+    in_flight = {}
+    stopping = False
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(args.processes, mp_context=context, initializer=_init_worker, initargs=(args.processes,)) as pool:
+        while True:
+            while not stopping and len(in_flight) < args.processes:
+                channel = pick_channel(channels)
+                if channel is None:
+                    break
+                task = {
+                    'channel_url': channel.entry['channel_url'],
+                    'chef_id': channel.chef_id,
+                    'limit': channel.entry['limit'],
+                    'incremental': channel.entry['incremental'],
+                    'extra_args': extra_args,
+                    'log_path': os.path.join(batch_dir, f"{channel.index:03d}.log"),
+                }
+                if channel.entry['incremental']:
+                    task['what'] = 'incremental run'
+                    future = pool.submit(crawl_slice, task)
+                elif channel.videos is None:
+                    task['what'] = 'listing'
+                    future = pool.submit(list_channel, task)
+                else:
+                    first = channel.next_video
+                    channel.next_video = min(len(channel.videos), first + args.slice_size)
+                    task['what'] = f"videos {first}-{channel.next_video}"
+                    task['videos_path'] = os.path.join(batch_dir, f"{channel.index:03d}-{first:05d}.videos.json")
+                    with open(task['videos_path'], 'w', encoding='utf-8') as f:
+                        json.dump(channel.videos[first:channel.next_video], f, ensure_ascii=False)
+                    future = pool.submit(crawl_slice, task)
+                channel.in_flight += 1
+                channel.started_at = channel.started_at or time.time()
+                in_flight[future] = (channel, task)
+
+            if not in_flight:
+                break
+
+            try:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            except KeyboardInterrupt:
+                stopping = True
+                print("\n🛑 Interrupted. Waiting for running slices to finish...")
+                continue
+
+            for future in done:
+                channel, task = in_flight.pop(future)
+                channel.in_flight -= 1
+                channel.finished_at = time.time()
+                what = task['what']
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = None
+                    channel.errors.append(f"{what.capitalize()}: {e}")
+                if result is None:
+                    channel.failed = True
+                    if not channel.errors:
+                        channel.errors.append(f"{what.capitalize()} did not start (see log)")
+                    continue
+
+                if what == 'listing':
+                    known = known_ids.get(channel.chef_id)
+                    channel.listed = len(result)
+                    channel.videos = [video for video in result if video['id'] not in known]
+                    channel.known = channel.listed - len(channel.videos)
+                    print(f"  [{channel.entry['chef']}] {task['channel_url']}: {channel.listed} listed, "
+                          f"{len(channel.videos)} new")
+                    continue
+                channel.results.append(result)
+                print(f"  [{channel.entry['chef']}] {task['channel_url']} {what}: "
+                      f"{result['success']} saved, {result['skip']} skipped, {result['fail']} failed")
+
+    rows = [channel.report() for channel in by_index]
+    print_report(rows)
+
+    report_path = os.path.join(batch_dir, 'report.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({'batch_id': batch_id, 'channels': rows}, f, ensure_ascii=False, indent=2)
+    print(f"📝 Report: {report_path}")
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+CACHE_DIR = os.getenv('CRAWLER_CACHE_DIR', os.path.join('.cache', 'crawler'))
+
+# Returned by get() on a miss, since None is a valid cached value.
+MISS = object()
+
+
+def hash_text(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SqliteCache:
+    """Thread-safe wrapper around one SQLite file under CACHE_DIR."""
+
+    SCHEMA = ''
+
+    def __init__(self, filename, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn = None
+        if enabled:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(CACHE_DIR, filename), timeout=30, check_same_thread=False)
+            self._conn.execute('pragma journal_mode=wal')
+            self._conn.executescript(self.SCHEMA)
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            rows = cur.fetchall()
+            self._conn.commit()
+            return rows
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+
+
+class ExtractionCache(SqliteCache):
+    """Parsed Gemini extractions, including `is_recipe: false` verdicts.
+
+    Keyed by video ID, a hash of the transcript or audio bytes, and the
+    prompt/model version, so a changed input or prompt is a clean miss.
+    Entries older than `max_age_days` are dropped, and the least recently
+    used ones go once the cache exceeds `max_entries` or `max_bytes`.
+    """
+
+    SCHEMA = '''
+        create table if not exists extractions (
+            video_id text not null,
+            content_hash text not null,
+            version text not null,
+            data text not null,
+            size integer not null,
+            created_at real not null,
+            accessed_at real not null,
+            primary key (video_id, content_hash, version)
+        );
+        create index if not exists extractions_accessed_at on extractions (accessed_at);
+    '''
+
+    def __init__(self, enabled=True, refresh=False, max_entries=20000, max_bytes=200 * 1024 * 1024, max_age_days=180):
+        super().__init__('extractions.sqlite3', enabled)
+        self.refresh = refresh
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        if enabled:
+            self.evict()
+
+    def get(self, video_id, content_hash, version):
+        if not self.enabled or self.refresh:
+            return MISS
+        rows = self._execute(
+            'select data, created_at from extractions where video_id = ? and content_hash = ? and version = ?',
+            (video_id, content_hash, version),
+        )
+        if not rows or rows[0][1] < time.time() - self.max_age:
+            return MISS
+        self._execute(
+            'update extractions set accessed_at = ? where video_id = ? and content_hash = ? and version = ?',
+            (time.time(), video_id, content_hash, version),
+        )
+        return json.loads(rows[0][0])
+
+    def put(self, video_id, content_hash, version, data):
+        if not self.enabled:
+            return
+        payload = json.dumps(data, ensure_ascii=False)
+        now = time.time()
+        self._execute(
+            'insert or replace into extractions values (?, ?, ?, ?, ?, ?, ?)',
+            (video_id, content_hash, version, payload, len(payload), now, now),
+        )
+
+    def evict(self):
+        self._execute('delete from extractions where created_at < ?', (time.time() - self.max_age,))
+        count, total = self._execute('select count(*), coalesce(sum(size), 0) from extractions')[0]
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Drop least recently used rows until both limits hold again
+        rows = self._execute('select video_id, content_hash, version, size from extractions order by accessed_at')
+        stale = []
+        for video_id, content_hash, version, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((video_id, content_hash, version))
+            count -= 1
+            total -= size
+        with self._lock:
+            self._conn.executemany(
+                'delete from extractions where video_id = ? and content_hash = ? and version = ?', stale
+            )
+            self._conn.commit()
+
+
+class TranscriptCache(SqliteCache):
+    """Fetched transcript text per video, plus 'no transcript' verdicts (stored as NULL).
+
+    Negative verdicts expire sooner, since captions are sometimes added
+    after upload.
+    """
+
+    SCHEMA = '''
+        create table if not exists transcripts (
+            video_id text primary key,
+            text text,
+            language text,
+            fetched_at real not null
+        );
+    '''
+
+    def __init__(self, enabled=True, refresh=False, max_age_days=180, negative_max_age_days=14):
+        super().__init__('transcripts.sqlite3', enabled)
+        self.refresh = refresh
+        self.max_age = max_age_days * 86400
+        self.negative_max_age = negative_max_age_days * 86400
+
+    def get(self, video_id):
+        """Returns the transcript text, None for a cached 'no transcript', or MISS."""
+        if not self.enabled or self.refresh:
+            return MISS
+        rows = self._execute('select text, fetched_at from transcripts where video_id = ?', (video_id,))
+        if not rows:
+            return MISS
+        text, fetched_at = rows[0]
+        max_age = self.max_age if text is not None else self.negative_max_age
+        if fetched_at < time.time() - max_age:
+            return MISS
+        return text
+
+    def put(self, video_id, text, language=None):
+        if not self.enabled:
+            return
+        self._execute(
+            'insert or replace into transcripts values (?, ?, ?, ?)',
+            (video_id, text, language, time.time()),
+        )
+
+
+class ShortsCache(SqliteCache):
+    """Shorts verdicts per video ID. A video never changes format, so verdicts never expire."""
+
+    SCHEMA = '''
+        create table if not exists shorts (
+            video_id text primary key,
+            is_short integer not null,
+            checked_at real not null
+        );
+    '''
+
+    def __init__(self, enabled=True):
+        super().__init__('shorts.sqlite3', enabled)
+
+    def get_many(self, video_ids):
+        """Returns {video_id: is_short} for the IDs that have a verdict."""
+        if not self.enabled:
+            return {}
+        verdicts = {}
+        video_ids = list(video_ids)
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(video_ids), 500):
+            chunk = video_ids[i:i + 500]
+            rows = self._execute(
+                f"select video_id, is_short from shorts where video_id in ({','.join('?' * len(chunk))})", chunk
+            )
+            verdicts.update((video_id, bool(is_short)) for video_id, is_short in rows)
+        return verdicts
+
+    def put(self, video_id, is_short):
+        if not self.enabled:
+            return
+        self._execute('insert or replace into shorts values (?, ?, ?)', (video_id, int(is_short), time.time()))
+
+
+class ChannelMarks(SqliteCache):
+    """High-water marks for incremental listing, per channel and chef.
+
+    A mark maps a tab ('videos', 'shorts', 'other') to the newest fully
+    processed video IDs in it. Several IDs are kept per tab so a deleted or
+    privated video does not make the next listing run all the way to the limit.
+    """
+
+    SCHEMA = '''
+        create table if not exists channel_marks (
+            channel_url text not null,
+            chef_id text not null,
+            mark text not null,
+            updated_at real not null,
+            primary key (channel_url, chef_id)
+        );
+    '''
+
+    def __init__(self, enabled=True):
+        super().__init__('channel_marks.sqlite3', enabled)
+
+    def get(self, channel_url, chef_id):
+        """Returns {tab: [video_id, ...]}, empty when the channel was never crawled incrementally."""
+        if not self.enabled:
+            return {}
+        rows = self._execute('select mark from channel_marks where channel_url = ? and chef_id = ?', (channel_url, chef_id))
+        return json.loads(rows[0][0]) if rows else {}
+
+    def put(self, channel_url, chef_id, mark):
+        if not self.enabled:
+            return
+        self._execute(
+            'insert or replace into channel_marks values (?, ?, ?, ?)',
+            (channel_url, chef_id, json.dumps(mark), time.time()),
+        )
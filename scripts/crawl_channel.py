@@ -1,65 +1,281 @@
 import os
-import sys
 import json
 import time
 import argparse
+import glob
+import shutil
+import contextvars
+import functools
+import itertools
 import urllib.parse
-from dotenv import load_dotenv
-from supabase import create_client, Client
-from youtube_transcript_api import YouTubeTranscriptApi
-import google.generativeai as genai
-import yt_dlp
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-# Load environment variables
-load_dotenv('.env.local')
+# yt_dlp, youtube_transcript_api and google.generativeai are imported on first
+# use (see clients.py), so --help and importing this module stay cheap.
+import clients
+import crawl_metrics
+import rate_limit
+from batch_writer import BatchWriter
+from chef_lookup import fetch_chefs
+from crawl_cache import CACHE_DIR, MISS, ChannelMarks, ExtractionCache, TranscriptCache, hash_file, hash_text
+from crawl_journal import FINAL_STAGES, RUNS_DIR, CrawlJournal
+from crawl_metrics import CrawlMetrics
+from crawl_pipeline import Pipeline, Stage
+from db_stream import iter_rows
+from gemini_files import UploadedFiles, sweep_orphaned_uploads
+from ingredient_catalog import normalize_ingredient_name, purchase_link_for
+from recipe_schema import RECIPE_SCHEMA, parse_recipe
+from transcript_compaction import compact_transcript, estimate_tokens, merge_recipes, split_transcript
+from youtube_urls import extract_video_id, shorts_url, watch_url
 
-# Setup Supabase
-SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+MODEL_NAME = 'gemini-2.5-pro'
+# Bump when a prompt changes so cached extractions from the old prompt are not reused.
+PROMPT_VERSION = 'v3'
+EXTRACTION_VERSION = f"{MODEL_NAME}:{PROMPT_VERSION}"
 
-if not all([SUPABASE_URL, SUPABASE_KEY, GEMINI_API_KEY]):
-    print("❌ Error: Missing environment variables. Check .env.local")
-    sys.exit(1)
+# Fixes partly broken responses; much cheaper than repeating the extraction
+REPAIR_MODEL_NAME = 'gemini-2.5-flash'
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-2.5-pro')
+# Plain dict form of genai.GenerationConfig, so building it needs no SDK import
+RECIPE_GENERATION_CONFIG = {
+    'response_mime_type': 'application/json',
+    'response_schema': RECIPE_SCHEMA,
+}
 
-def get_channel_videos(channel_url, limit=10):
+# Transcripts longer than this (after compaction) are split and extracted in parallel.
+CHUNK_TOKENS = 8000
+CHUNK_WORKERS = 4
+
+def _tab_kind(url):
+    """'shorts', 'videos' (a channel tab without Shorts) or None for anything else."""
+    path = urllib.parse.urlparse(url or '').path.rstrip('/')
+    if path.endswith('/shorts'):
+        return 'shorts'
+    if path.endswith(('/videos', '/streams')):
+        return 'videos'
+    return None
+
+
+def _is_playlist_ref(entry):
+    """An unresolved link to another playlist, e.g. a channel's Videos or Shorts tab."""
+    return entry.get('_type') in ('url', 'url_transparent') and entry.get('ie_key') == 'YoutubeTab'
+
+
+def _flatten_entries(ydl, info, tab=None, stop_at=()):
+    """Yields (entry, tab kind) for every video, descending into the per-tab playlists of a channel page.
+
+    Works on unprocessed extract_info results: entries are consumed lazily,
+    tab playlists are only extracted when reached, and each playlist is read
+    newest first and abandoned at its first ID in stop_at.
+    """
+    tab = _tab_kind(info.get('webpage_url') or info.get('url')) or tab
+    for entry in info.get('entries') or ():
+        if not entry:
+            continue
+        if _is_playlist_ref(entry):
+            nested = rate_limit.call('youtube', ydl.extract_info, entry['url'], download=False, process=False)
+            yield from _flatten_entries(ydl, nested, _tab_kind(entry['url']) or tab, stop_at)
+        elif entry.get('_type') == 'playlist' or 'entries' in entry:
+            yield from _flatten_entries(ydl, entry, tab, stop_at)
+        elif entry.get('id') in stop_at:
+            return
+        else:
+            yield entry, tab
+
+
+def _listing_entry(entry, tab):
+    """What the journal and the pipeline keep from a flat yt-dlp entry.
+
+    is_short is True for /shorts/ URLs or entries of a Shorts tab, False for
+    entries of a Videos/Live tab, and None when the listing cannot tell.
+    """
+    if '/shorts/' in (entry.get('url') or '') or tab == 'shorts':
+        is_short = True
+    elif tab == 'videos':
+        is_short = False
+    else:
+        is_short = None
+    duration = entry.get('duration')
+    return {
+        'id': entry['id'],
+        'title': entry.get('title'),
+        'duration': int(duration) if duration is not None else None,
+        'is_short': is_short,
+    }
+
+
+def get_channel_videos(channel_url, limit=10, stop_at=()):
+    """Flat listing of up to `limit` videos, newest first.
+
+    The listing is not processed by yt-dlp: entries are read as they are
+    needed, so continuation pages are only requested until `limit` videos
+    have been seen. With stop_at (incremental mode) each tab also stops
+    at its first already processed ID, so a refresh of an unchanged channel
+    costs the first page of each tab.
+    """
     print(f"🔍 Fetching videos from {channel_url} (Limit: {limit})...")
     ydl_opts = {
         'quiet': True,
         'extract_flat': True,
-        'playlistend': limit,
     }
     
+    import yt_dlp
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(channel_url, download=False)
-        if 'entries' in info:
-            return info['entries']
-        return []
+        info = rate_limit.call('youtube', ydl.extract_info, channel_url, download=False, process=False)
+        # Channel URLs may redirect, e.g. to the canonical /channel/UC... form
+        while _is_playlist_ref(info):
+            info = rate_limit.call('youtube', ydl.extract_info, info['url'], download=False, process=False)
+        entries = _flatten_entries(ydl, info, _tab_kind(channel_url), set(stop_at))
+        if limit:
+            entries = itertools.islice(entries, limit)
+        return [_listing_entry(entry, tab) for entry, tab in entries]
+
+
+def _mark_tab(video):
+    return {True: 'shorts', False: 'videos'}.get(video.get('is_short'), 'other')
+
+
+def next_channel_mark(listed, jobs, previous, per_tab=5):
+    """The high-water mark to store after a run.
+
+    Per tab, the mark only moves past videos listed after (older than) the
+    last one that failed or was not processed, so a failed video is listed
+    again next time. Videos with a final journal outcome (saved, or rejected
+    as a duplicate or not a recipe) are done. A tab without such videos
+    keeps its previous mark.
+    """
+    finished = {job.video_id for job in jobs if job.final_stage}
+    by_tab = {}
+    for video in listed:
+        by_tab.setdefault(_mark_tab(video), []).append(video['id'])
+
+    mark = dict(previous)
+    for tab, ids in by_tab.items():
+        done = []
+        for video_id in ids:
+            if video_id in finished:
+                done.append(video_id)
+            else:
+                done = []
+        if done:
+            # Older marked IDs stay behind the new ones as fallbacks
+            mark[tab] = (done + [v for v in previous.get(tab, []) if v not in done])[:per_tab]
+    return mark
+
+
+TRANSCRIPT_LANGUAGES = ['ko', 'ko-KR']
+
+
+def _list_transcripts(video_id):
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+    # youtube-transcript-api >= 1.0 lists through an instance, older releases through a static method
+    api = YouTubeTranscriptApi()
+    if hasattr(api, 'list'):
+        return api.list(video_id)
+    return YouTubeTranscriptApi.list_transcripts(video_id)
+
+
+def _pick_transcript(transcript_list):
+    """Best track in priority order: manual Korean, auto-generated Korean, translated to Korean, anything."""
+    tracks = list(transcript_list)
+    korean = [t for t in tracks if t.language_code in TRANSCRIPT_LANGUAGES]
+
+    for t in korean:
+        if not t.is_generated:
+            return t
+    for t in korean:
+        if t.is_generated:
+            return t
+    for t in tracks:
+        if t.is_translatable:
+            return t.translate('ko')
+    return tracks[0] if tracks else None
+
+
+def get_transcript(video_id, cache=None):
+    """Lists the video's caption tracks once and fetches the best one. Returns None if there is none."""
+    from youtube_transcript_api import NoTranscriptFound, TranscriptsDisabled, VideoUnavailable
+
+    if cache is not None:
+        cached = cache.get(video_id)
+        if cached is not MISS:
+            return cached
 
-def get_transcript(video_id):
     try:
-        transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=['ko'])
-        return ' '.join([item['text'] for item in transcript_list])
-    except Exception:
-        # Try finding auto-generated korean or fallback
-        try:
-             transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=['ko-KR', 'en'])
-             return ' '.join([item['text'] for item in transcript_list])
-        except Exception as e:
-            # print(f"    ⚠️ No transcript found: {e}")
-            return None
+        transcript = _pick_transcript(rate_limit.call('youtube', _list_transcripts, video_id))
+        if transcript is None:
+            raise NoTranscriptFound(video_id, TRANSCRIPT_LANGUAGES, None)
+        items = rate_limit.call('youtube', transcript.fetch)
+    except (TranscriptsDisabled, NoTranscriptFound, VideoUnavailable):
+        # A real "no captions" answer: remember it so the next run goes straight to audio
+        if cache is not None:
+            cache.put(video_id, None)
+        return None
+    except Exception as e:
+        # Network errors and blocks are not cached
+        # print(f"    ⚠️ No transcript found: {e}")
+        return None
+
+    text = ' '.join([item['text'] if isinstance(item, dict) else item.text for item in items])
+    if cache is not None:
+        cache.put(video_id, text, transcript.language_code)
+    return text
+
+def repair_recipe(raw_text, errors):
+    """Asks the cheap model to fix a partly broken response instead of re-running the full extraction."""
+    prompt = f"""
+    The following JSON recipe does not match the required schema.
+    Problems: {'; '.join(errors[:20])}
+
+    Fix only those problems and keep every other value unchanged. Use Korean for any text you have to add.
+
+    JSON:
+    {raw_text}
+    """
+    response = rate_limit.call(
+        'gemini', clients.get_model(REPAIR_MODEL_NAME).generate_content, prompt,
+        generation_config=RECIPE_GENERATION_CONFIG, tokens=estimate_tokens(prompt),
+    )
+    crawl_metrics.record_tokens(REPAIR_MODEL_NAME, response)
+    data, errors = parse_recipe(response.text)
+    if errors:
+        raise ValueError(f"Repair failed: {'; '.join(errors[:5])}")
+    return data
+
+
+def generate_recipe(contents):
+    """Runs one schema-constrained extraction call and returns a validated recipe dict."""
+    parts = contents if isinstance(contents, list) else [contents]
+    # Audio parts are not counted; the text prompt is what the estimate can see
+    prompt_tokens = sum(estimate_tokens(part) for part in parts if isinstance(part, str))
+    response = rate_limit.call(
+        'gemini', clients.get_model(MODEL_NAME).generate_content, contents,
+        generation_config=RECIPE_GENERATION_CONFIG, tokens=prompt_tokens,
+    )
+    crawl_metrics.record_tokens(MODEL_NAME, response)
+    data, errors = parse_recipe(response.text)
+    if errors:
+        print(f"    🩹 Repairing response ({len(errors)} problems)...")
+        data = repair_recipe(response.text, errors)
+    return data
+
+
+def _extract_text_chunk(transcript_text, title, part=None, parts=None):
+    part_note = ""
+    if parts and parts > 1:
+        part_note = f"""
+    This is part {part} of {parts} of a long transcript. Extract only the ingredients and steps mentioned in this part, in the order they appear.
+    Set "is_recipe": true if this part belongs to a cooking recipe, even if the dish is only finished in another part.
+    """
 
-def extract_recipe_with_ai(transcript_text, title):
     prompt = f"""
     You are a professional chef data assistant.
     Analyze the following YouTube video transcript for a video titled "{title}" and extract the recipe information into a structured JSON format.
 
     Transcript:
-    "{transcript_text[:15000]}"
+    "{transcript_text}"
 
     Please output ONLY valid JSON (no markdown code blocks) with the following structure:
     {{
@@ -85,56 +301,110 @@ def extract_recipe_with_ai(transcript_text, title):
     IMPORTANT:
     1. If the content is NOT a cooking recipe (e.g. mukbang, vlog without recipe, simple review), set "is_recipe": false.
     2. Translate everything to Korean.
-    """
+    {part_note}"""
     
     try:
-        response = model.generate_content(prompt)
-        text = response.text.replace('```json', '').replace('```', '').strip()
-        data = json.loads(text)
-        if isinstance(data, list):
-            data = data[0] if data else None
-        return data
+        return generate_recipe(prompt)
     except Exception as e:
         print(f"    ❌ AI Parsing Error: {e}")
         return None
 
 
-def download_audio(video_id):
-    """Downloads audio from YouTube video as mp3, returns file path."""
+def extract_recipe_with_ai(transcript_text, title):
+    """Compacts the transcript, then extracts it in one call or map-reduces token-budgeted chunks in parallel."""
+    compacted = compact_transcript(transcript_text)
+    if estimate_tokens(compacted) <= CHUNK_TOKENS:
+        return _extract_text_chunk(compacted, title)
+
+    chunks = split_transcript(compacted, CHUNK_TOKENS)
+    print(f"    ✂️ Long transcript: extracting {len(chunks)} parts in parallel...")
+    # One copy of this thread's context per chunk keeps the chunk calls attributed to this video in crawl_metrics
+    contexts = [contextvars.copy_context() for _ in chunks]
+    with ThreadPoolExecutor(max_workers=min(len(chunks), CHUNK_WORKERS)) as pool:
+        parts = list(pool.map(
+            lambda i: contexts[i].run(_extract_text_chunk, chunks[i], title, i + 1, len(chunks)),
+            range(len(chunks)),
+        ))
+
+    # A missing part would silently drop steps, so treat it as a failed extraction
+    if any(p is None for p in parts):
+        return None
+    return merge_recipes(parts)
+
+
+# 'native' keeps YouTube's own audio stream (m4a/webm, no ffmpeg pass);
+# 'mono' downmixes to low-bitrate mono opus for the smallest upload.
+AUDIO_MODES = ('native', 'mono')
+
+AUDIO_MIME_TYPES = {
+    '.m4a': 'audio/mp4',
+    '.mp4': 'audio/mp4',
+    '.webm': 'audio/webm',
+    '.opus': 'audio/ogg',
+    '.ogg': 'audio/ogg',
+    '.mp3': 'audio/mp3',
+}
+
+
+class AudioWorkspace:
+    """Per-run directory for downloaded audio under the crawler cache.
+
+    Lives under the run ID so a resumed run can still find files downloaded
+    before the interruption. Removed only when the run completes; runs that
+    were interrupted or crashed keep theirs for --resume, and directories
+    nobody resumed are swept after `stale_after` seconds.
+    """
+
+    def __init__(self, run_id, stale_after=86400):
+        root = os.path.join(CACHE_DIR, 'audio')
+        os.makedirs(root, exist_ok=True)
+        now = time.time()
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name != run_id and os.path.isdir(path) and now - os.path.getmtime(path) > stale_after:
+                shutil.rmtree(path, ignore_errors=True)
+        self.path = os.path.join(root, run_id)
+        os.makedirs(self.path, exist_ok=True)
+
+    def cleanup(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def download_audio(video_id, out_dir='.', mode='native'):
+    """Downloads a speech-friendly audio stream of the video into out_dir, returns file path."""
     try:
-        url = f"https://www.youtube.com/watch?v={video_id}"
+        url = watch_url(video_id)
         ydl_opts = {
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '128',
-            }],
-            'outtmpl': f'temp_{video_id}.%(ext)s',
+            # The smallest audio-only stream is plenty for speech recognition
+            'format': 'worstaudio/bestaudio/best',
+            'outtmpl': os.path.join(out_dir, f'{video_id}.%(ext)s'),
             'quiet': True,
         }
+        if mode == 'mono':
+            ydl_opts['postprocessors'] = [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'opus',
+                'preferredquality': '24',
+            }]
+            ydl_opts['postprocessor_args'] = {'extractaudio': ['-ac', '1']}
+        import yt_dlp
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        return f"temp_{video_id}.mp3"
+            rate_limit.call('youtube', ydl.download, [url])
+
+        # The extension depends on the stream YouTube served
+        files = sorted(glob.glob(os.path.join(glob.escape(out_dir), f'{glob.escape(video_id)}.*')))
+        files = [f for f in files if not f.endswith(('.part', '.ytdl'))]
+        if not files:
+            return None
+        crawl_metrics.record_bytes('downloaded', os.path.getsize(files[0]))
+        return files[0]
     except Exception as e:
         print(f"    ❌ Audio Download Error: {e}")
         return None
 
-def extract_recipe_from_audio(audio_path, title):
-    """Uploads audio to Gemini and extracts recipe."""
+def extract_recipe_from_audio(audio_file, title):
+    """Extracts a recipe from audio already uploaded to Gemini (see UploadedFiles.upload)."""
     try:
-        # 1. Upload File
-        audio_file = genai.upload_file(path=audio_path)
-        
-        # Wait for processing (usually instant for small files)
-        while audio_file.state.name == "PROCESSING":
-            time.sleep(1)
-            audio_file = genai.get_file(audio_file.name)
-
-        if audio_file.state.name == "FAILED":
-            raise ValueError("Audio processing failed on Gemini side.")
-
-        # 2. Generate Content
         prompt = f"""
         You are a professional chef data assistant.
         Listen to the provided audio from a cooking video titled "{title}".
@@ -166,193 +436,593 @@ def extract_recipe_from_audio(audio_path, title):
         2. Translate everything to Korean.
         """
 
-        response = model.generate_content([audio_file, prompt])
-        
-        # Cleanup remote file
-        genai.delete_file(audio_file.name)
-
-        text = response.text.replace('```json', '').replace('```', '').strip()
-        data = json.loads(text)
-        if isinstance(data, list):
-            data = data[0] if data else None
-        return data
+        return generate_recipe([audio_file, prompt])
 
     except Exception as e:
         print(f"    ❌ AI Audio Parsing Error: {e}")
         return None
 
 
+class KnownVideos:
+    """In-memory set of YouTube IDs already in `recipes`, loaded once per run."""
+
+    def __init__(self, video_ids=()):
+        self._ids = set(video_ids)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, chef_id=None):
+        """Reads every stored video URL (optionally for one chef) and normalizes it to an ID."""
+        where = (lambda q: q.eq('chef_id', chef_id)) if chef_id else None
+        ids = set()
+        for row in iter_rows('recipes', 'video_url', where=where, prefetch=True):
+            video_id = extract_video_id(row['video_url'])
+            if video_id:
+                ids.add(video_id)
+        return cls(ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, video_id):
+        return video_id in self._ids
+
+    def claim(self, video_id):
+        """Marks an ID as taken. Returns False if it was already known."""
+        with self._lock:
+            if video_id in self._ids:
+                return False
+            self._ids.add(video_id)
+            return True
+
+    def release(self, video_id):
+        """Forgets an ID whose save failed, so it is not reported as a duplicate."""
+        with self._lock:
+            self._ids.discard(video_id)
+
+
+def is_unique_violation(error):
+    return getattr(error, 'code', None) == '23505' or '23505' in str(error)
+
+
+_print_lock = threading.Lock()
+
+def log(message):
+    """print() that keeps lines from concurrent workers from interleaving."""
+    with _print_lock:
+        print(message, flush=True)
+
+
+class VideoJob:
+    """Per-video state handed from one pipeline stage to the next."""
+
+    def __init__(self, video_id, title, duration=None, is_short=None):
+        self.video_id = video_id
+        self.title = title
+        self.duration = duration
+        self.is_short = is_short
+        self.video_url = shorts_url(video_id) if is_short else watch_url(video_id)
+        self.transcript = None
+        self.transcript_checked = False
+        self.audio_path = None
+        self.content_hash = None
+        self.audio_file = None  # Gemini upload, deleted once extraction is done
+        self.recipe_data = None
+        self.recipe_id = None
+        self.status = None  # 'success' | 'skip' | 'fail'
+        self.final_stage = None  # 'saved' | 'rejected' once the journal has the video's outcome
+        self.restored = False
+
+    def log(self, message):
+        log(f"    [{self.video_id}] {message}")
+
+    def restore(self, state):
+        """Applies the progress a previous attempt recorded in the run journal."""
+        stage = state['stage']
+        if stage in FINAL_STAGES:
+            self.final_stage = stage
+        if stage == 'saved':
+            self.status = 'success'
+            self.recipe_id = state.get('recipe_id')
+            self.restored = True
+            return
+        if stage == 'rejected':
+            self.status = state.get('status', 'fail')
+            self.restored = True
+            return
+
+        if stage in ('transcript', 'audio', 'extracted'):
+            self.transcript_checked = True
+            self.transcript = state.get('transcript')
+        audio_path = state.get('audio_path')
+        if audio_path and os.path.exists(audio_path):
+            self.audio_path = audio_path
+        if stage == 'extracted':
+            self.recipe_data = state.get('recipe_data')
+
+
+class CrawlContext:
+    """Shared state every stage needs for one crawl run."""
+
+    def __init__(self, chef_id, known, cache, transcripts, journal, audio_dir, audio_mode, uploads):
+        self.chef_id = chef_id
+        self.known = known
+        self.cache = cache
+        self.transcripts = transcripts
+        self.journal = journal
+        self.audio_dir = audio_dir
+        self.audio_mode = audio_mode
+        self.uploads = uploads
+
+    def reject(self, job, status, reason):
+        job.status = status
+        job.final_stage = 'rejected'
+        self.journal.record(job.video_id, 'rejected', status=status, reason=reason)
+
+
+def stage_transcript(job, ctx):
+    """Duplicate check, then transcript fetch."""
+    log(f"\n🎬 Processing: {job.title} ({job.video_id})")
+
+    # Check Duplicates against the IDs preloaded at startup
+    if not ctx.known.claim(job.video_id):
+        job.log("⏭️ Already exists. Skipping.")
+        ctx.reject(job, 'skip', 'duplicate')
+        return None
+
+    if not job.transcript_checked:
+        job.transcript = get_transcript(job.video_id, ctx.transcripts)
+        job.transcript_checked = True
+        ctx.journal.record(job.video_id, 'transcript', transcript=job.transcript)
+    return job
+
+
+def stage_audio(job, ctx):
+    """Downloads audio only for videos without a transcript."""
+    if job.transcript or job.recipe_data or job.audio_path:
+        return job
+
+    job.log("🎧 No transcript. Switching to Audio Mode...")
+    job.audio_path = download_audio(job.video_id, ctx.audio_dir, ctx.audio_mode)
+    if not job.audio_path:
+        job.log("❌ Failed to download audio. Skipping.")
+        job.status = 'fail'
+        ctx.known.release(job.video_id)
+        return None
+    ctx.journal.record(job.video_id, 'audio', audio_path=job.audio_path)
+    return job
+
+
+def _content_hash(job):
+    if job.content_hash is None:
+        job.content_hash = hash_text(job.transcript) if job.transcript else hash_file(job.audio_path)
+    return job.content_hash
+
+
+def _remove_audio(job):
+    if job.audio_path:
+        # Cleanup
+        try:
+            os.remove(job.audio_path)
+        except OSError:
+            pass
+        job.audio_path = None
+
+
+def stage_upload(job, ctx):
+    """Uploads audio to Gemini and waits for processing, so extract workers never block on it."""
+    if job.transcript or job.recipe_data:
+        return job
+
+    cached = ctx.cache.get(job.video_id, _content_hash(job), EXTRACTION_VERSION)
+    if cached is not MISS:
+        job.log("💾 Using cached extraction.")
+        job.recipe_data = cached
+        _remove_audio(job)
+        return job
+
+    job.log("☁️ Uploading audio to Gemini...")
+    mime_type = AUDIO_MIME_TYPES.get(os.path.splitext(job.audio_path)[1].lower())
+    try:
+        job.audio_file = ctx.uploads.upload(job.audio_path, job.video_id, mime_type)
+        crawl_metrics.record_bytes('uploaded', os.path.getsize(job.audio_path))
+    except Exception as e:
+        job.log(f"❌ Audio Upload Error: {e}")
+        job.status = 'fail'
+        ctx.known.release(job.video_id)
+        return None
+    return job
+
+
+def stage_extract(job, ctx):
+    """Runs the Gemini extraction on the transcript or the uploaded audio, reusing cached results."""
+    try:
+        if job.recipe_data is None:
+            cached = MISS
+            if job.transcript:
+                cached = ctx.cache.get(job.video_id, _content_hash(job), EXTRACTION_VERSION)
+
+            if cached is not MISS:
+                job.log("💾 Using cached extraction.")
+                job.recipe_data = cached
+            elif job.transcript:
+                job.log("🧠 Analyzing Text with AI...")
+                job.recipe_data = extract_recipe_with_ai(job.transcript, job.title)
+            else:
+                job.log("🧠 Analyzing Audio with AI (Listening)...")
+                job.recipe_data = extract_recipe_from_audio(job.audio_file, job.title)
+
+            # Failed calls return None and are retried next run; real verdicts are kept
+            if cached is MISS and job.recipe_data is not None:
+                ctx.cache.put(job.video_id, _content_hash(job), EXTRACTION_VERSION, job.recipe_data)
+    finally:
+        if job.audio_file is not None:
+            ctx.uploads.delete(job.audio_file)
+            job.audio_file = None
+        _remove_audio(job)
+
+    if not job.recipe_data:
+        job.log("⚠️ Extraction failed. Skipping.")
+        job.status = 'fail'
+        ctx.known.release(job.video_id)
+        return None
+    if not job.recipe_data.get('is_recipe'):
+        job.log("⚠️ Not a recipe. Skipping.")
+        ctx.reject(job, 'fail', 'not_recipe')
+        return None
+
+    ctx.journal.record(job.video_id, 'extracted', recipe_data=job.recipe_data)
+    return job
+
+
+def build_recipe_document(job, chef_id):
+    """The save_recipe() RPC payload: recipe columns plus nested ingredients and steps."""
+    recipe_data = job.recipe_data
+    video_id = job.video_id
+    return {
+        'title': recipe_data['title'],
+        'chef_id': chef_id,
+        'image_url': f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
+        'time': recipe_data['time'],
+        'calories': recipe_data['calories'],
+        'protein': recipe_data['nutrition']['protein'],
+        'fat': recipe_data['nutrition']['fat'],
+        'carbs': recipe_data['nutrition']['carbs'],
+        'is_recommended': False,
+        'video_url': job.video_url,
+        'video_id': video_id,
+        'duration': job.duration,
+        'is_short': job.is_short,
+        'ingredients': [
+            {
+                'name': ing['name'],
+                'amount': ing['amount'],
+                'canonical_name': canonical,
+                'purchase_link': purchase_link_for(canonical)
+            }
+            for ing in recipe_data['ingredients']
+            for canonical in [normalize_ingredient_name(ing['name'])]
+        ],
+        'steps': [
+            {
+                'step_order': step['order'],
+                'description': step['description']
+            }
+            for step in recipe_data['steps']
+        ],
+    }
+
+
+class RecipeWriter:
+    """Save stage backend: buffers extracted recipes and writes them with the save_recipes RPC."""
+
+    def __init__(self, ctx, batch_size=20, batch_wait=5.0):
+        self.ctx = ctx
+        self.writer = BatchWriter(
+            self._write_batch, self._on_written, self._on_failed,
+            max_batch=batch_size, max_wait=batch_wait,
+        )
+
+    def _write_batch(self, jobs):
+        docs = [build_recipe_document(job, self.ctx.chef_id) for job in jobs]
+        with crawl_metrics.timer('save_batch'):
+            res = rate_limit.call('supabase', clients.get_supabase().rpc('save_recipes', {'docs': docs}).execute)
+        return {row['video_id']: row for row in res.data}
+
+    def _on_written(self, jobs, rows):
+        for job in jobs:
+            row = rows.get(job.video_id) or {}
+            new_recipe_id = row.get('recipe_id')
+            if new_recipe_id is None:
+                job.log("⏭️ Already exists. Skipping.")
+                self.ctx.reject(job, 'skip', 'duplicate')
+                continue
+            job.recipe_id = new_recipe_id
+            if row.get('created', True):
+                job.log(f"✅ Saved! (ID: {new_recipe_id})")
+            else:
+                # A retried batch whose first attempt committed, or another crawler saved it first
+                job.log(f"✅ Already saved. (ID: {new_recipe_id})")
+            job.status = 'success'
+            job.final_stage = 'saved'
+            self.ctx.journal.record(job.video_id, 'saved', recipe_id=new_recipe_id)
+
+    def _on_failed(self, job, error):
+        if is_unique_violation(error):
+            job.log("⏭️ Already exists. Skipping.")
+            self.ctx.reject(job, 'skip', 'duplicate')
+        else:
+            job.log(f"❌ Save Error: {error}")
+            job.status = 'fail'
+            self.ctx.known.release(job.video_id)
+
+    def close(self):
+        self.writer.close()
+
+
+def stage_save(job, writer):
+    """Queues the recipe for the next bulk write; its status is set once the batch is flushed."""
+    writer.writer.add(job)
+    return None
+
+
+def on_stage_error(job, stage, error):
+    job.log(f"❌ {stage.name} error: {error}")
+    job.status = 'fail'
+
+
 def get_chefs():
     try:
-        res = supabase.table('chefs').select('id, name').execute()
-        return res.data
+        return fetch_chefs()
     except Exception as e:
         print(f"❌ Failed to fetch chefs: {e}")
         return []
 
-def main():
+def build_parser():
     parser = argparse.ArgumentParser(description='Crawl YouTube Channel for Recipes')
     parser.add_argument('url', nargs='?', help='YouTube Channel URL')
     parser.add_argument('--chef-id', help='UUID of the Chef to assign recipes to')
     parser.add_argument('--limit', type=int, default=100, help='Number of videos to check')
+    parser.add_argument('--videos', metavar='PATH',
+                        help='JSON list of already listed videos to crawl instead of listing the channel (see crawl_batch.py)')
+    parser.add_argument('--resume', metavar='RUN_ID', help='Continue an interrupted run from its journal')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only list videos newer than the last processed ones of this channel (see channel_marks)')
+    parser.add_argument('--workers', type=int, default=4, help='Default concurrency for every stage')
+    parser.add_argument('--transcript-workers', type=int, help='Concurrent transcript fetches')
+    parser.add_argument('--audio-workers', type=int, help='Concurrent audio downloads')
+    parser.add_argument('--upload-workers', type=int, help='Concurrent Gemini audio uploads (including processing waits)')
+    parser.add_argument('--ai-workers', type=int, help='Concurrent Gemini extractions')
+    parser.add_argument('--db-workers', type=int, help='Concurrent DB writers')
+    parser.add_argument('--audio-mode', choices=AUDIO_MODES, default='native',
+                        help='native: keep the original audio stream; mono: downmix to low-bitrate mono opus')
+    parser.add_argument('--dedup-scope', choices=['global', 'chef'], default='global',
+                        help='Skip videos already saved for any chef (global) or only for this chef')
+    parser.add_argument('--no-known-check', action='store_true',
+                        help='Do not load the stored video IDs; the --videos list is already deduplicated (saves still skip duplicates)')
+    parser.add_argument('--no-sweep', action='store_true', help='Do not delete orphaned Gemini uploads at start (crawl_batch.py sweeps once)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the local transcript/extraction caches')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached transcripts and extractions but store the new ones')
+    parser.add_argument('--batch-size', type=int, default=20, help='Recipes written per save request')
+    parser.add_argument('--batch-wait', type=float, default=5.0, help='Max seconds a recipe waits for its batch to fill')
+    parser.add_argument('--queue-size', type=int, default=8, help='Max videos waiting between two stages')
+    parser.add_argument('--metrics', metavar='PATH', help='JSON-lines metrics file (default: next to the run journal)')
+    parser.add_argument('--prom-file', metavar='PATH', help='Also write the run metrics as a Prometheus textfile')
+    parser.add_argument('--export-documents', action='store_true',
+                        help='Afterwards, rebuild the precomputed pages of changed recipes (export_recipe_documents.py)')
+    return parser
+
+
+def select_chef():
+    """Interactive chef prompt; returns the chosen chef ID, or None if there are no chefs."""
+    chefs = get_chefs()
+    if not chefs:
+        print("❌ No chefs found in DB. Please seed data first.")
+        return None
     
-    args = parser.parse_args()
+    print("Available Chefs:")
+    for idx, chef in enumerate(chefs):
+        print(f"[{idx+1}] {chef['name']}")
+    
+    while True:
+        try:
+            selection = input(f"\nSelect Chef (1-{len(chefs)}) or enter UUID: ").strip()
+            if not selection: continue
+            
+            if len(selection) > 30: # Assume UUID
+                return selection
+            
+            idx = int(selection) - 1
+            if 0 <= idx < len(chefs):
+                print(f"✅ Selected: {chefs[idx]['name']}")
+                return chefs[idx]['id']
+            else:
+                print("❌ Invalid selection.")
+        except ValueError:
+            print("❌ Invalid input.")
+
+
+def run_crawl(args):
+    """Crawls one channel for one chef with the options from build_parser().
+
+    Returns a summary dict (counts per outcome and the run ID), or None if
+    the run could not start.
+    """
+    # Fail before listing anything if a client could not be created later
+    clients.require_env('NEXT_PUBLIC_SUPABASE_URL', 'NEXT_PUBLIC_SUPABASE_ANON_KEY', 'GEMINI_API_KEY')
 
-    # Interactive Mode
     channel_url = args.url
     chef_id = args.chef_id
     limit = args.limit
+    dedup_scope = args.dedup_scope
+    incremental = args.incremental
+    if args.videos and incremental:
+        print("❌ --videos cannot be combined with --incremental (the listing is already given)")
+        return None
 
-    print("\n🧑‍🍳 Anti Gravity Recipe Crawler 🕷️\n")
+    # 0. Resume a previous run (settings and listing come from its journal)
+    journal = None
+    listed = None
+    progress = {}
+    if args.resume:
+        try:
+            journal = CrawlJournal.open(args.resume)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            return None
+        settings, listed, progress = journal.load()
+        channel_url = settings['channel_url']
+        chef_id = settings['chef_id']
+        limit = settings['limit']
+        dedup_scope = settings.get('dedup_scope', dedup_scope)
+        incremental = settings.get('incremental', False)
+        print(f"♻️ Resuming run {journal.run_id}")
 
-    # 1. Select Chef
-    if not chef_id:
-        chefs = get_chefs()
-        if not chefs:
-            print("❌ No chefs found in DB. Please seed data first.")
-            return
-        
-        print("Available Chefs:")
-        for idx, chef in enumerate(chefs):
-            print(f"[{idx+1}] {chef['name']}")
-        
-        while True:
-            try:
-                selection = input(f"\nSelect Chef (1-{len(chefs)}) or enter UUID: ").strip()
-                if not selection: continue
-                
-                if len(selection) > 30: # Assume UUID
-                    chef_id = selection
-                    break
-                
-                idx = int(selection) - 1
-                if 0 <= idx < len(chefs):
-                    chef_id = chefs[idx]['id']
-                    print(f"✅ Selected: {chefs[idx]['name']}")
-                    break
-                else:
-                    print("❌ Invalid selection.")
-            except ValueError:
-                print("❌ Invalid input.")
-
-    # 2. Input URL
-    if not channel_url:
-        while True:
-            channel_url = input("\nEnter Channel/Shorts URL (e.g. @paik_boy/shorts): ").strip()
-            if channel_url: break
-
-    # 3. Input Limit (Optional loop, skipping simplicity)
+    if journal is None:
+        journal = CrawlJournal.create({
+            'channel_url': channel_url,
+            'chef_id': chef_id,
+            'limit': limit,
+            'dedup_scope': dedup_scope,
+            'incremental': incremental,
+        })
+    print(f"📝 Run ID: {journal.run_id} (continue later with --resume {journal.run_id})")
     
     print(f"\n🚀 Starting Crawl for {channel_url}...")
     
     # 4. Get Videos
-    videos = get_channel_videos(channel_url, limit)
-    print(f"📋 Found {len(videos)} videos. Processing...")
+    marks = ChannelMarks(enabled=incremental)
+    mark_key = channel_url.rstrip('/')
+    previous_mark = marks.get(mark_key, chef_id)
+    stop_at = {video_id for ids in previous_mark.values() for video_id in ids}
+    if stop_at:
+        print(f"📍 Incremental: listing stops at {len(stop_at)} previously processed videos.")
+    metrics = CrawlMetrics(
+        journal.run_id,
+        args.metrics or os.path.join(RUNS_DIR, f'{journal.run_id}.metrics.jsonl'),
+        args.prom_file,
+    ).start()
+    if listed is None:
+        if args.videos:
+            with open(args.videos, encoding='utf-8') as f:
+                listed = json.load(f)
+        else:
+            with crawl_metrics.timer('listing'):
+                listed = get_channel_videos(channel_url, limit, stop_at)
+        journal.record_listing(listed)
+    print(f"📋 Found {len(listed)} videos. Processing...")
 
-    success_count = 0
-    skip_count = 0
-    fail_count = 0
+    jobs = []
+    for video in listed:
+        job = VideoJob(video['id'], video['title'], video.get('duration'), video.get('is_short'))
+        if video['id'] in progress:
+            job.restore(progress[video['id']])
+        jobs.append(job)
+    restored_count = sum(1 for job in jobs if job.restored)
+    if restored_count:
+        print(f"♻️ {restored_count} videos already finished in the previous attempt.")
 
-    for video in videos:
-        video_id = video['id']
-        title = video['title']
-        video_url = f"https://www.youtube.com/watch?v={video_id}"
+    # 5. Load known video IDs once for duplicate checks
+    if args.no_known_check:
+        known = KnownVideos()
+    else:
+        known = KnownVideos.load(chef_id if dedup_scope == 'chef' else None)
+        print(f"🗂️ {len(known)} videos already in DB ({dedup_scope}).")
 
-        print(f"\n🎬 Processing: {title} ({video_id})")
+    # 6. Run the staged pipeline
+    cache = ExtractionCache(enabled=not args.no_cache, refresh=args.refresh)
+    transcripts = TranscriptCache(enabled=not args.no_cache, refresh=args.refresh)
+    audio = AudioWorkspace(journal.run_id)
+    if not args.no_sweep:
+        swept = sweep_orphaned_uploads()
+        if swept:
+            print(f"🧹 Deleted {swept} orphaned Gemini uploads.")
+    uploads = UploadedFiles()
+    ctx = CrawlContext(chef_id, known, cache, transcripts, journal, audio.path, args.audio_mode, uploads)
+    writer = RecipeWriter(ctx, args.batch_size, args.batch_wait)
+    workers = args.workers
+    pipeline = Pipeline([
+        Stage('transcript', metrics.timed('transcript', functools.partial(stage_transcript, ctx=ctx)), args.transcript_workers or workers),
+        Stage('audio', metrics.timed('audio', functools.partial(stage_audio, ctx=ctx)), args.audio_workers or workers),
+        Stage('upload', metrics.timed('upload', functools.partial(stage_upload, ctx=ctx)), args.upload_workers or workers),
+        Stage('extract', metrics.timed('extract', functools.partial(stage_extract, ctx=ctx)), args.ai_workers or workers),
+        Stage('save', metrics.timed('save', functools.partial(stage_save, writer=writer)), args.db_workers or workers),
+    ], queue_size=args.queue_size, on_error=on_stage_error)
 
-        # Check DB Duplicates (Partial match for ID to catch both watch?v= and /shorts/)
-        existing = supabase.table('recipes').select('id').ilike('video_url', f'%{video_id}%').execute()
-        if existing.data:
-            print("    ⏭️ Already exists. Skipping.")
-            skip_count += 1
-            continue
+    interrupted = False
+    try:
+        pipeline.run(job for job in jobs if job.status is None)
+    except KeyboardInterrupt:
+        interrupted = True
+        print("\n🛑 Interrupted. Waiting for in-flight videos...")
+    finally:
+        # Final flush, also on Ctrl-C, so extracted recipes are not lost
+        writer.close()
+        uploads.delete_all()
+    if not interrupted:
+        audio.cleanup()
 
-        # Get Transcript
-        transcript = get_transcript(video_id)
-        
-        recipe_data = None
-        
-        if transcript:
-            print("    🧠 Analyzing Text with AI...")
-            recipe_data = extract_recipe_with_ai(transcript, title)
+    if incremental:
+        if stop_at and limit and len(listed) >= limit:
+            # The listing may not have reached the old mark; moving it would hide the gap for good
+            print(f"⚠️ Listing hit --limit {limit} before the previous mark; mark not moved. Rerun with a higher --limit.")
         else:
-            print("    🎧 No transcript. Switching to Audio Mode...")
-            audio_path = download_audio(video_id)
-            if audio_path:
-                print("    🧠 Analyzing Audio with AI (Listening)...")
-                recipe_data = extract_recipe_from_audio(audio_path, title)
-                # Cleanup
-                try:
-                    os.remove(audio_path)
-                except:
-                    pass
-            else:
-                print("    ❌ Failed to download audio. Skipping.")
-                fail_count += 1
-                continue
+            marks.put(mark_key, chef_id, next_channel_mark(listed, jobs, previous_mark))
 
-        if not recipe_data or not recipe_data.get('is_recipe'):
-            print("    ⚠️ Not a recipe. Skipping.")
-            fail_count += 1
-            continue
+    run_metrics = metrics.finish(jobs)
+    cache.close()
+    transcripts.close()
+    marks.close()
+    journal.close()
 
-        # Insert into DB
-        try:
-            # Insert Recipe
-            recipe_payload = {
-                'title': recipe_data['title'],
-                'chef_id': chef_id,
-                'image_url': f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
-                'time': recipe_data['time'],
-                'calories': recipe_data['calories'],
-                'protein': recipe_data['nutrition']['protein'],
-                'fat': recipe_data['nutrition']['fat'],
-                'carbs': recipe_data['nutrition']['carbs'],
-                'is_recommended': False,
-                'video_url': video_url
-            }
-            res_recipe = supabase.table('recipes').insert(recipe_payload).execute()
-            new_recipe_id = res_recipe.data[0]['id']
-
-            # Insert Ingredients
-            if recipe_data['ingredients']:
-                ing_payload = [
-                    {
-                        'recipe_id': new_recipe_id, 
-                        'name': ing['name'], 
-                        'amount': ing['amount'],
-                        'purchase_link': f"https://www.coupang.com/np/search?component=&q={urllib.parse.quote(ing['name'])}&channel=user"
-                    } 
-                    for ing in recipe_data['ingredients']
-                ]
-                supabase.table('ingredients').insert(ing_payload).execute()
-
-            # Insert Steps
-            if recipe_data['steps']:
-                step_payload = [
-                    {
-                        'recipe_id': new_recipe_id,
-                        'step_order': step['order'],
-                        'description': step['description']
-                    }
-                    for step in recipe_data['steps']
-                ]
-                supabase.table('steps').insert(step_payload).execute()
-
-            print(f"    ✅ Saved! (ID: {new_recipe_id})")
-            success_count += 1
-
-        except Exception as e:
-            print(f"    ❌ Save Error: {e}")
-            fail_count += 1
-
-        # Rate limiting
-        time.sleep(1)
+    success_count = sum(1 for job in jobs if job.status == 'success')
+    skip_count = sum(1 for job in jobs if job.status == 'skip')
+    fail_count = sum(1 for job in jobs if job.status == 'fail')
+    pending_count = len(jobs) - success_count - skip_count - fail_count
 
     print("\n" + "="*50)
-    print(f"🎉 Finished!")
+    print(f"🎉 Finished!" if not interrupted else "🛑 Stopped early.")
     print(f"Success: {success_count} | Skipped: {skip_count} | Failed: {fail_count}")
+    if pending_count:
+        print(f"Not processed: {pending_count} (continue with --resume {journal.run_id})")
+    print(f"⏱️ {run_metrics['videos_per_min']} videos/min | Gemini ≈ ${run_metrics['cost_usd']}"
+          + (f" (${run_metrics['cost_per_recipe_usd']}/recipe)" if run_metrics['cost_per_recipe_usd'] is not None else ""))
+    print(f"📈 Metrics: {metrics.path}")
     print("="*50)
 
+    if args.export_documents and success_count:
+        import export_recipe_documents
+        export_recipe_documents.export()
+
+    return {
+        'run_id': journal.run_id,
+        'channel_url': channel_url,
+        'chef_id': chef_id,
+        'listed': len(listed),
+        'success': success_count,
+        'skip': skip_count,
+        'fail': fail_count,
+        'pending': pending_count,
+        'interrupted': interrupted,
+        'metrics': run_metrics,
+    }
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    print("\n🧑‍🍳 Anti Gravity Recipe Crawler 🕷️\n")
+
+    # Interactive Mode (a resumed run takes both from its journal)
+    if not args.resume:
+        if not args.chef_id:
+            args.chef_id = select_chef()
+            if not args.chef_id:
+                return
+        while not args.url:
+            args.url = input("\nEnter Channel/Shorts URL (e.g. @paik_boy/shorts): ").strip()
+
+    run_crawl(args)
+
 if __name__ == "__main__":
     main()
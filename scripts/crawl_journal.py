@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import threading
+
+from crawl_cache import CACHE_DIR
+
+RUNS_DIR = os.path.join(CACHE_DIR, 'runs')
+
+# Per-video stages, in pipeline order. 'saved' and 'rejected' are final.
+STAGES = ('listed', 'transcript', 'audio', 'extracted', 'saved', 'rejected')
+FINAL_STAGES = ('saved', 'rejected')
+
+
+def new_run_id():
+    return time.strftime('%Y%m%d-%H%M%S')
+
+
+class CrawlJournal:
+    """Append-only JSON-lines log of one crawl run.
+
+    The first line holds the run settings, the second the channel listing,
+    and every later line one finished stage of one video with whatever that
+    stage produced (transcript text, audio path, extracted recipe, recipe ID).
+    Replaying the file rebuilds each video's progress for --resume.
+    """
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self.path = os.path.join(RUNS_DIR, f'{run_id}.jsonl')
+        self._lock = threading.Lock()
+        self._file = None
+
+    @classmethod
+    def create(cls, settings):
+        os.makedirs(RUNS_DIR, exist_ok=True)
+        journal = cls(new_run_id())
+        while True:
+            try:
+                # Exclusive create, so parallel crawls (crawl_batch.py) never share a run ID
+                open(journal.path, 'x').close()
+                break
+            except FileExistsError:
+                time.sleep(1)
+                journal = cls(new_run_id())
+        journal._write({'event': 'run', 'settings': settings, 'at': time.time()})
+        return journal
+
+    @classmethod
+    def open(cls, run_id):
+        journal = cls(run_id)
+        if not os.path.exists(journal.path):
+            raise FileNotFoundError(f"No journal for run '{run_id}' in {RUNS_DIR}")
+        return journal
+
+    def _write(self, entry):
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._file.flush()
+
+    def record_listing(self, videos):
+        self._write({'event': 'listed', 'videos': videos, 'at': time.time()})
+
+    def record(self, video_id, stage, **data):
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        self._write({'event': 'stage', 'video_id': video_id, 'stage': stage, 'data': data, 'at': time.time()})
+
+    def load(self):
+        """Returns (settings, videos, progress) where progress maps video_id -> {'stage', ...data}."""
+        settings = {}
+        videos = None
+        progress = {}
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash; everything before it is intact.
+                    continue
+                if entry['event'] == 'run':
+                    settings = entry['settings']
+                elif entry['event'] == 'listed':
+                    videos = entry['videos']
+                elif entry['event'] == 'stage':
+                    state = progress.setdefault(entry['video_id'], {})
+                    state.update(entry['data'])
+                    state['stage'] = entry['stage']
+        return settings, videos, progress
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
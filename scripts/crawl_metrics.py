@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import bisect
+import threading
+import contextvars
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+import rate_limit
+
+# Upper bounds (seconds) of the stage latency histograms.
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# USD per million tokens (input, output). Override with GEMINI_PRICE_<MODEL>="in,out",
+# e.g. GEMINI_PRICE_GEMINI_2_5_PRO="1.25,10".
+DEFAULT_PRICES = {
+    'gemini-2.5-pro': (1.25, 10.0),
+    'gemini-2.5-flash': (0.30, 2.50),
+}
+
+# The video whose stage is running in this thread (or chunk worker, see crawl_channel).
+current_video = contextvars.ContextVar('current_video', default=None)
+
+_active = None
+
+
+def price_of(model_name):
+    override = os.getenv('GEMINI_PRICE_' + model_name.upper().replace('-', '_').replace('.', '_'))
+    if override:
+        price_in, price_out = (float(p) for p in override.split(','))
+        return price_in, price_out
+    return DEFAULT_PRICES.get(model_name, (0.0, 0.0))
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.values = []
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.values.append(value)
+
+    def summary(self):
+        values = sorted(self.values)
+        if not values:
+            return {'count': 0}
+        return {
+            'count': len(values),
+            'sum': round(sum(values), 3),
+            'p50': round(values[len(values) // 2], 3),
+            'p95': round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+            'max': round(values[-1], 3),
+        }
+
+
+class VideoMetrics:
+    def __init__(self):
+        self.stages = defaultdict(float)
+        self.gemini_calls = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.cost = 0.0
+        self.retries = Counter()
+        self.bytes_downloaded = 0
+        self.bytes_uploaded = 0
+
+
+class CrawlMetrics:
+    """Timings, Gemini token usage, retries and bytes moved for one crawl run.
+
+    Every finished stage call is appended to a JSON-lines file as it happens;
+    finish() appends one record per video and a run summary, and optionally
+    writes a Prometheus textfile (for node_exporter's textfile collector).
+    Instrumented code reports through the module functions below, which are
+    no-ops while no run is active.
+    """
+
+    def __init__(self, run_id, path, prom_path=None):
+        self.run_id = run_id
+        self.path = path
+        self.prom_path = prom_path
+        self.started = time.time()
+        self.histograms = defaultdict(Histogram)
+        self.videos = defaultdict(VideoMetrics)
+        self.requests = Counter()
+        self.retries = Counter()
+        self.tokens = Counter()
+        self.bytes = Counter()
+        self.cost = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def start(self):
+        global _active
+        _active = self
+        rate_limit.add_observer(self._on_rate_limit_event)
+        return self
+
+    def _write(self, entry):
+        entry = {'run_id': self.run_id, 'at': round(time.time(), 3), **entry}
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._file.flush()
+
+    def _on_rate_limit_event(self, backend, event):
+        video_id = current_video.get()
+        with self._lock:
+            if event == 'request':
+                self.requests[backend] += 1
+            elif event == 'retry':
+                self.retries[backend] += 1
+                if video_id:
+                    self.videos[video_id].retries[backend] += 1
+
+    def observe_stage(self, stage, seconds, outcome, video_id=None):
+        with self._lock:
+            self.histograms[stage].observe(seconds)
+            if video_id:
+                self.videos[video_id].stages[stage] += seconds
+        self._write({'event': 'stage', 'stage': stage, 'video_id': video_id, 'seconds': round(seconds, 4), 'outcome': outcome})
+
+    def timed(self, stage, func):
+        """Wraps a pipeline stage function (job -> job or None) with a timer."""
+        def wrapper(job):
+            token = current_video.set(job.video_id)
+            started = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = func(job)
+                outcome = 'ok' if result is not None else 'stopped'
+                return result
+            finally:
+                self.observe_stage(stage, time.perf_counter() - started, outcome, job.video_id)
+                current_video.reset(token)
+        return wrapper
+
+    def record_tokens(self, model_name, usage):
+        prompt = getattr(usage, 'prompt_token_count', 0) or 0
+        response = getattr(usage, 'candidates_token_count', 0) or 0
+        price_in, price_out = price_of(model_name)
+        cost = (prompt * price_in + response * price_out) / 1_000_000
+        video_id = current_video.get()
+        with self._lock:
+            self.tokens[f'{model_name}:prompt'] += prompt
+            self.tokens[f'{model_name}:response'] += response
+            self.cost += cost
+            if video_id:
+                video = self.videos[video_id]
+                video.gemini_calls += 1
+                video.prompt_tokens += prompt
+                video.response_tokens += response
+                video.cost += cost
+
+    def record_bytes(self, direction, count):
+        video_id = current_video.get()
+        with self._lock:
+            self.bytes[direction] += count
+            if video_id:
+                video = self.videos[video_id]
+                if direction == 'downloaded':
+                    video.bytes_downloaded += count
+                else:
+                    video.bytes_uploaded += count
+
+    def finish(self, jobs):
+        """Writes per-video records and the run summary; returns the summary."""
+        rate_limit.remove_observer(self._on_rate_limit_event)
+        global _active
+        if _active is self:
+            _active = None
+
+        statuses = Counter(job.status or 'pending' for job in jobs)
+        for job in jobs:
+            video = self.videos.get(job.video_id)
+            if video is None:
+                continue
+            self._write({
+                'event': 'video',
+                'video_id': job.video_id,
+                'status': job.status or 'pending',
+                'source': 'transcript' if job.transcript else 'audio',
+                'stages': {name: round(seconds, 3) for name, seconds in video.stages.items()},
+                'gemini_calls': video.gemini_calls,
+                'prompt_tokens': video.prompt_tokens,
+                'response_tokens': video.response_tokens,
+                'cost_usd': round(video.cost, 6),
+                'retries': dict(video.retries),
+                'bytes_downloaded': video.bytes_downloaded,
+                'bytes_uploaded': video.bytes_uploaded,
+            })
+
+        elapsed = time.time() - self.started
+        processed = sum(n for status, n in statuses.items() if status != 'pending')
+        summary = {
+            'event': 'run',
+            'elapsed': round(elapsed, 2),
+            'videos': len(jobs),
+            'statuses': dict(statuses),
+            'videos_per_min': round(processed / elapsed * 60, 2) if elapsed else 0,
+            'stages': {name: h.summary() for name, h in self.histograms.items()},
+            'requests': dict(self.requests),
+            'retries': dict(self.retries),
+            'tokens': dict(self.tokens),
+            'bytes': dict(self.bytes),
+            'cost_usd': round(self.cost, 4),
+            'cost_per_recipe_usd': round(self.cost / statuses['success'], 4) if statuses['success'] else None,
+        }
+        self._write(summary)
+        with self._lock:
+            self._file.close()
+        if self.prom_path:
+            self.write_prometheus(summary)
+        return summary
+
+    def write_prometheus(self, summary):
+        lines = [
+            '# HELP crawler_stage_seconds Time spent per pipeline stage call.',
+            '# TYPE crawler_stage_seconds histogram',
+        ]
+        for stage, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ('+Inf',), histogram.counts):
+                cumulative += count
+                lines.append(f'crawler_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'crawler_stage_seconds_sum{{stage="{stage}"}} {sum(histogram.values):.4f}')
+            lines.append(f'crawler_stage_seconds_count{{stage="{stage}"}} {len(histogram.values)}')
+
+        def counter(name, help_text, values, label):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for key, value in sorted(values.items()):
+                lines.append(f'{name}{{{label}="{key}"}} {value}')
+
+        counter('crawler_videos_total', 'Videos by final status.', summary['statuses'], 'status')
+        counter('crawler_requests_total', 'Rate-limited requests by backend, including retries.', self.requests, 'backend')
+        counter('crawler_retries_total', 'Retried requests by backend.', self.retries, 'backend')
+        counter('crawler_gemini_tokens_total', 'Gemini tokens by model and direction.', self.tokens, 'kind')
+        counter('crawler_bytes_total', 'Audio bytes downloaded from YouTube and uploaded to Gemini.', self.bytes, 'direction')
+        lines.append('# HELP crawler_cost_usd Estimated Gemini cost of the run.')
+        lines.append('# TYPE crawler_cost_usd gauge')
+        lines.append(f'crawler_cost_usd {self.cost:.6f}')
+        lines.append('# HELP crawler_run_seconds Wall time of the run.')
+        lines.append('# TYPE crawler_run_seconds gauge')
+        lines.append(f"crawler_run_seconds {summary['elapsed']}")
+
+        # Write-then-rename so the collector never reads a half-written file
+        tmp = self.prom_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp, self.prom_path)
+
+
+def record_tokens(model_name, response):
+    """Records the token usage of a Gemini response for the current video."""
+    usage = getattr(response, 'usage_metadata', None)
+    if _active is not None and usage is not None:
+        _active.record_tokens(model_name, usage)
+
+
+def record_bytes(direction, count):
+    """direction is 'downloaded' (from YouTube) or 'uploaded' (to Gemini)."""
+    if _active is not None and count:
+        _active.record_bytes(direction, count)
+
+
+@contextmanager
+def timer(stage):
+    """Times work outside the per-video stages (listing, batch writes)."""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        if _active is not None:
+            _active.observe_stage(stage, time.perf_counter() - started, outcome, current_video.get())
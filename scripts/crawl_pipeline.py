@@ -0,0 +1,125 @@
+import queue
+import threading
+import traceback
+
+# Marks the end of the stream for one worker of a stage.
+_DONE = object()
+
+
+class Stage:
+    """One step of the pipeline: a function applied to each item by its own worker pool.
+
+    `func(item)` returns the item to hand to the next stage, or None when the
+    item is finished (skipped, failed, or fully processed).
+    """
+
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+
+
+class Pipeline:
+    """Runs items through stages connected by bounded queues.
+
+    Each stage gets its own threads, so slow network stages (transcripts,
+    audio, Gemini, DB) overlap instead of waiting on each other. A full queue
+    blocks the stage before it, which keeps memory bounded and lets the
+    producer (channel listing) run only as far ahead as the workers can take.
+    """
+
+    def __init__(self, stages, queue_size=8, on_error=None):
+        self.stages = stages
+        self.queue_size = max(1, int(queue_size))
+        self.on_error = on_error
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def _put(self, q, item):
+        # Block while the queue is full, but give up once a stop was requested.
+        while True:
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                if self._stop.is_set() and item is not _DONE:
+                    return False
+
+    def _worker(self, idx, queues, remaining, lock):
+        stage = self.stages[idx]
+        inbox = queues[idx]
+        outbox = queues[idx + 1] if idx + 1 < len(queues) else None
+
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                with lock:
+                    remaining[idx] -= 1
+                    last = remaining[idx] == 0
+                # The last worker to leave closes the next stage.
+                if last and outbox is not None:
+                    for _ in range(self.stages[idx + 1].workers):
+                        self._put(outbox, _DONE)
+                return
+
+            if self._stop.is_set():
+                continue
+
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                result = None
+                if self.on_error:
+                    self.on_error(item, stage, e)
+                else:
+                    traceback.print_exc()
+
+            if result is not None and outbox is not None:
+                self._put(outbox, result)
+
+    def run(self, items):
+        """Feeds `items` (any iterable, consumed lazily) through all stages and waits for completion."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        remaining = [s.workers for s in self.stages]
+        lock = threading.Lock()
+
+        threads = []
+        for idx, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                t = threading.Thread(
+                    target=self._worker,
+                    args=(idx, queues, remaining, lock),
+                    name=f"{stage.name}-{n + 1}",
+                    daemon=True,
+                )
+                t.start()
+                threads.append(t)
+
+        try:
+            for item in items:
+                if self._stop.is_set() or not self._put(queues[0], item):
+                    break
+        except KeyboardInterrupt:
+            self._stop.set()
+            raise
+        finally:
+            for _ in range(self.stages[0].workers):
+                self._put(queues[0], _DONE)
+
+            # Join with a timeout so Ctrl-C still reaches the main thread.
+            try:
+                for t in threads:
+                    while t.is_alive():
+                        t.join(0.2)
+            except KeyboardInterrupt:
+                self._stop.set()
+                for t in threads:
+                    while t.is_alive():
+                        t.join(0.2)
+                raise
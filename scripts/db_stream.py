@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import rate_limit
+from clients import get_supabase
+
+PAGE_SIZE = 1000
+
+
+def _with_column(columns, name):
+    if columns.strip() == '*' or name in (c.strip() for c in columns.split(',')):
+        return columns
+    return f'{columns}, {name}'
+
+
+def _page_query(table, columns, where, key, page_size, last):
+    query = get_supabase().table(table).select(columns)
+    if where:
+        query = where(query)
+    if key == 'id':
+        query = query.order('id')
+        if last:
+            query = query.gt('id', last['id'])
+    else:
+        # A non-unique key (e.g. created_at) is paged by (key, id)
+        query = query.order(key).order('id')
+        if last:
+            value = last[key]
+            query = query.or_(f'{key}.gt."{value}",and({key}.eq."{value}",id.gt.{last["id"]})')
+    return query.limit(page_size)
+
+
+def iter_rows(table, columns='*', where=None, key='id', page_size=PAGE_SIZE, prefetch=False):
+    """Yields every row of a table, one page at a time, in key order.
+
+    Pages are keyset-paginated (`key > last seen`) rather than offset, so
+    requests stay the same size however deep the scan goes, and rows the
+    caller updates while iterating are neither skipped nor repeated.
+    `where` narrows the query, e.g. `lambda q: q.eq('chef_id', chef_id)`.
+    With prefetch=True the next page is requested while the caller is still
+    working through the current one.
+
+    Only an empty page ends the scan: PostgREST caps responses at its
+    max-rows setting, so a page shorter than page_size is not the last one.
+    """
+    if key != 'id':
+        columns = _with_column(columns, key)
+    columns = _with_column(columns, 'id')
+
+    def fetch(last):
+        query = _page_query(table, columns, where, key, page_size, last)
+        return rate_limit.call('supabase', query.execute).data
+
+    def cursor(rows):
+        # Copied before the rows are yielded, since callers may modify them
+        return {key: rows[-1][key], 'id': rows[-1]['id']}
+
+    if not prefetch:
+        rows = fetch(None)
+        while rows:
+            last = cursor(rows)
+            yield from rows
+            rows = fetch(last)
+        return
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        rows = fetch(None)
+        while rows:
+            pending = executor.submit(fetch, cursor(rows))
+            yield from rows
+            rows = pending.result()
+
+
+def batched(iterable, size):
+    """Splits an iterable into lists of at most size items."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
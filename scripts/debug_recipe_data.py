@@ -1,21 +1,8 @@
-
-import os
-import sys
-from dotenv import load_dotenv
-from supabase import create_client, Client
-
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
-
-if not all([SUPABASE_URL, SUPABASE_KEY]):
-    print("Missing env vars")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from clients import get_supabase
+from db_stream import iter_rows
 
 def main():
+    supabase = get_supabase()
     # 1. Find Chef '정호영'
     print("Searching for Chef 정호영...")
     res = supabase.table('chefs').select('*').ilike('name', '%정호영%').execute()
@@ -29,12 +16,13 @@ def main():
 
     # 2. Get Recipes
     print("\nFetching Recipes...")
-    recipes = supabase.table('recipes').select('title, time, video_url').eq('chef_id', chef['id']).execute()
+    recipes = iter_rows('recipes', 'title, time, video_url, duration, is_short', where=lambda q: q.eq('chef_id', chef['id']))
 
-    for r in recipes.data:
+    for r in recipes:
         print(f"Title: {r['title']}")
         print(f"Time: {r['time']}")
         print(f"URL: {r['video_url']}")
+        print(f"Listing: is_short={r.get('is_short')}, duration={r.get('duration')}s")
         
         # Test Heuristic
         is_shorts_url = '/shorts/' in r['video_url']
@@ -0,0 +1,130 @@
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import rate_limit
+from clients import get_supabase
+from db_stream import batched, iter_rows
+
+# Recipe columns copied into each document; the shape matches what the recipe page selects
+RECIPE_COLUMNS = ('id, title, chef_id, image_url, time, calories, protein, fat, carbs, is_recommended, '
+                  'video_url, video_id, duration, is_short, created_at, updated_at')
+# What a chef page needs per recipe card
+LISTING_COLUMNS = 'id, title, image_url, time, calories, is_recommended, created_at'
+
+RECIPE_CHUNK = 100
+SHARD_SIZE = 50
+# Transactions that commit late can carry an updated_at older than the last export;
+# re-reading a few minutes back catches them (rebuilding a document is idempotent)
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def export_watermark():
+    """recipes.updated_at of the newest exported document, minus the overlap; None before the first export."""
+    query = get_supabase().table('recipe_documents').select('source_updated_at').order('source_updated_at', desc=True).limit(1)
+    res = rate_limit.call('supabase', query.execute)
+    if not res.data:
+        return None
+    return (datetime.fromisoformat(res.data[0]['source_updated_at']) - WATERMARK_OVERLAP).isoformat()
+
+
+def fetch_children(table, columns, recipe_ids):
+    """{recipe_id: [rows]} for ingredients or steps of a chunk of recipes."""
+    grouped = defaultdict(list)
+    for row in iter_rows(table, 'recipe_id, ' + columns, where=lambda q: q.in_('recipe_id', recipe_ids)):
+        recipe_id = row.pop('recipe_id')
+        row.pop('id', None)
+        grouped[recipe_id].append(row)
+    return grouped
+
+
+def build_document(recipe, chef, ingredients, steps):
+    doc = {key: value for key, value in recipe.items() if key != 'updated_at'}
+    doc['chefs'] = {'name': chef['name'], 'image_url': chef['image_url']} if chef else None
+    doc['ingredients'] = ingredients
+    doc['steps'] = sorted(steps, key=lambda s: s['step_order'])
+    return doc
+
+
+def build_shards(chef_id, shard_size=SHARD_SIZE):
+    """The chef's recipe cards, newest first, in shards of shard_size, and the newest updated_at among them."""
+    listing = list(iter_rows('recipes', LISTING_COLUMNS + ', updated_at', where=lambda q: q.eq('chef_id', chef_id)))
+    updated = [datetime.fromisoformat(r.pop('updated_at')) for r in listing]
+    listing.sort(key=lambda r: (r['created_at'], r['id']), reverse=True)
+    shards = [listing[i:i + shard_size] for i in range(0, len(listing), shard_size)]
+    return shards, max(updated).isoformat() if updated else None
+
+
+def stale_chef_indexes(chef_ids):
+    """Chefs whose index holds a different number of recipes than they have, e.g. after a recipe was deleted."""
+    query = get_supabase().table('chef_recipe_index').select('chef_id, recipe_count').eq('shard', 0)
+    indexed = {row['chef_id']: row['recipe_count'] for row in rate_limit.call('supabase', query.execute).data}
+    stale = set()
+    for chef_id in chef_ids:
+        query = get_supabase().table('recipes').select('id', count='exact').eq('chef_id', chef_id).limit(1)
+        if rate_limit.call('supabase', query.execute).count != indexed.get(chef_id, 0):
+            stale.add(chef_id)
+    return stale
+
+
+def export(full=False, shard_size=SHARD_SIZE, dry_run=False):
+    """Rebuilds the documents of recipes changed since the last export, then the indexes of their chefs.
+
+    Chefs whose index counts a different number of recipes than they have
+    (a recipe was deleted) are rebuilt too; deleted recipes' documents go
+    with them by cascade. full=True rebuilds every document and every chef.
+    """
+    chefs = {c['id']: c for c in iter_rows('chefs', 'id, name, image_url')}
+    since = None if full else export_watermark()
+    where = (lambda q: q.gte('updated_at', since)) if since else None
+    print("📦 Exporting recipe documents " + (f"changed since {since}" if since else "(all recipes)") + "...")
+
+    exported = 0
+    touched_chefs = set(chefs) if full else set()
+    rows = iter_rows('recipes', RECIPE_COLUMNS, where=where, key='updated_at', prefetch=True)
+    for recipes in batched(rows, RECIPE_CHUNK):
+        recipe_ids = [r['id'] for r in recipes]
+        ingredients = fetch_children('ingredients', 'name, amount, purchase_link', recipe_ids)
+        steps = fetch_children('steps', 'step_order, description', recipe_ids)
+        docs = [
+            {
+                'recipe_id': r['id'],
+                'chef_id': r['chef_id'],
+                'doc': build_document(r, chefs.get(r['chef_id']), ingredients.get(r['id'], []), steps.get(r['id'], [])),
+                'source_updated_at': r['updated_at'],
+            }
+            for r in recipes
+        ]
+        touched_chefs.update(r['chef_id'] for r in recipes)
+        if dry_run:
+            exported += len(docs)
+        else:
+            res = rate_limit.call('supabase', get_supabase().rpc('save_recipe_documents', {'docs': docs}).execute)
+            exported += res.data or 0
+        print(f"  Exported {exported} documents...")
+
+    if not full:
+        touched_chefs |= stale_chef_indexes(set(chefs) - touched_chefs)
+    for chef_id in touched_chefs:
+        shards, source_updated_at = build_shards(chef_id, shard_size)
+        if not dry_run:
+            rate_limit.call('supabase', get_supabase().rpc('save_chef_recipe_index', {
+                'target_chef_id': chef_id, 'shards': shards, 'source_updated_at': source_updated_at}).execute)
+        name = chefs[chef_id]['name'] if chef_id in chefs else chef_id
+        print(f"  Chef {name}: {sum(len(s) for s in shards)} recipes in {len(shards)} shards")
+
+    print(f"Done. Exported {exported} documents and {len(touched_chefs)} chef indexes." + (" (dry run)" if dry_run else ""))
+    return exported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Precompute recipe page documents and per-chef listing shards')
+    parser.add_argument('--full', action='store_true', help='Rebuild everything, not only recipes changed since the last export')
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE, help='Recipes per chef index shard')
+    parser.add_argument('--dry-run', action='store_true', help='Build the documents without writing them')
+    args = parser.parse_args(argv)
+    export(full=args.full, shard_size=args.shard_size, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
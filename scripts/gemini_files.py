@@ -0,0 +1,87 @@
+import time
+import threading
+from datetime import datetime, timezone
+
+import clients
+import rate_limit
+
+# Every upload from the crawler is named with this prefix, so orphans can be found later.
+DISPLAY_PREFIX = 'recipe-crawler-'
+
+
+class UploadedFiles:
+    """Owns the upload -> processing -> use -> delete lifecycle of Gemini files.
+
+    Every file uploaded through here is tracked until it is deleted, and
+    delete_all() removes whatever a failed or interrupted stage left behind.
+    """
+
+    def __init__(self, timeout=300, initial_delay=0.5, max_delay=8.0):
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self._names = set()
+        self._lock = threading.Lock()
+
+    def upload(self, path, display_name, mime_type=None):
+        """Uploads a file and waits (exponential backoff, bounded by timeout) until it is ACTIVE."""
+        remote = rate_limit.call('gemini', clients.get_genai().upload_file, path=path, mime_type=mime_type, display_name=DISPLAY_PREFIX + display_name)
+        with self._lock:
+            self._names.add(remote.name)
+
+        try:
+            delay = self.initial_delay
+            deadline = time.monotonic() + self.timeout
+            while remote.state.name == "PROCESSING":
+                if time.monotonic() + delay > deadline:
+                    raise TimeoutError(f"Gemini file {remote.name} still processing after {self.timeout}s")
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_delay)
+                remote = rate_limit.call('gemini', clients.get_genai().get_file, remote.name)
+
+            if remote.state.name == "FAILED":
+                raise ValueError("Audio processing failed on Gemini side.")
+        except BaseException:
+            self.delete(remote)
+            raise
+        return remote
+
+    def delete(self, remote):
+        name = getattr(remote, 'name', remote)
+        with self._lock:
+            self._names.discard(name)
+        try:
+            rate_limit.call('gemini', clients.get_genai().delete_file, name)
+        except Exception as e:
+            print(f"    ⚠️ Failed to delete Gemini file {name}: {e}")
+
+    def delete_all(self):
+        with self._lock:
+            names = list(self._names)
+        for name in names:
+            self.delete(name)
+
+
+def sweep_orphaned_uploads(min_age=3600):
+    """Deletes crawler uploads older than min_age seconds left behind by crashed runs."""
+    deleted = 0
+    now = datetime.now(timezone.utc)
+    try:
+        for remote in rate_limit.call('gemini', lambda: list(clients.get_genai().list_files())):
+            if not (getattr(remote, 'display_name', '') or '').startswith(DISPLAY_PREFIX):
+                continue
+            created = getattr(remote, 'create_time', None)
+            if created is not None:
+                if created.tzinfo is None:
+                    created = created.replace(tzinfo=timezone.utc)
+                if (now - created).total_seconds() < min_age:
+                    # Possibly in use by another crawler that is still running
+                    continue
+            try:
+                rate_limit.call('gemini', clients.get_genai().delete_file, remote.name)
+                deleted += 1
+            except Exception:
+                pass
+    except Exception as e:
+        print(f"⚠️ Could not list Gemini uploads: {e}")
+    return deleted
@@ -0,0 +1,133 @@
+import re
+import argparse
+import unicodedata
+import urllib.parse
+from functools import lru_cache
+
+DEFAULT_LINK_TEMPLATE = "https://www.coupang.com/np/search?component=&q={query}&channel=user"
+
+# Different names for the same thing you would buy.
+SYNONYMS = {
+    '진간장': '간장',
+    '양조간장': '간장',
+    '왜간장': '간장',
+    '백설탕': '설탕',
+    '흰설탕': '설탕',
+    '꽃소금': '소금',
+    '천일염': '소금',
+    '달걀': '계란',
+    '달걀노른자': '계란노른자',
+    '달걀흰자': '계란흰자',
+    '식용류': '식용유',
+    '후추가루': '후춧가루',
+    '후추': '후춧가루',
+}
+
+# "(선택)", "[시판]" and similar asides.
+_ASIDE_RE = re.compile(r'[\(\[（][^\)\]）]*[\)\]）]')
+# Quantities that leaked into the name: "돼지고기 300g", "양파 1/2개", "간장 2큰술", "소금 약간".
+# Matched against the lowercased name, so "1L" and "1Kg" are quantities too.
+_QUANTITY_RE = re.compile(
+    r'\d+(?:[./~-]\d+)?\s*(?:kg|g|mg|ml|l|cc|개|큰술|작은술|숟가락|스푼|컵|tbsp|tsp|t|줌|꼬집|모|장|알|쪽|대|마리|인분|봉지|팩|캔|공기|조각|톨)?'
+    r'|약간|적당량|적당히|조금|한줌|반개|소량'
+)
+
+# Known inputs and their canonical names, checked by --check.
+NORMALIZE_EXAMPLES = {
+    '진간장 2큰술 ': '간장',
+    '양파 1/2개': '양파',
+    '돼지고기 300g': '돼지고기',
+    '돼지고기 300G': '돼지고기',
+    '우유 1L': '우유',
+    '우유 200ML': '우유',
+    '소고기 1KG': '소고기',
+    '소고기 1Kg': '소고기',
+    '설탕 1Tbsp': '설탕',
+    '소금 1tsp': '소금',
+    '다진 마늘 (선택)': '다진마늘',
+    '후추 약간': '후춧가루',
+    '2개': '2개',
+}
+
+
+@lru_cache(maxsize=65536)
+def normalize_ingredient_name(name):
+    """Canonical catalog key for a free-text ingredient name ("진간장 2큰술 " -> "간장").
+
+    Cached per process: the same few thousand names repeat across every recipe.
+    """
+    text = unicodedata.normalize('NFKC', name or '').lower()
+    text = _ASIDE_RE.sub(' ', text)
+    text = _QUANTITY_RE.sub(' ', text)
+    text = re.sub(r'[\s,/·]+', '', text)
+    if not text:
+        # Nothing but a quantity; keep the original so it still has a key
+        text = re.sub(r'\s+', '', unicodedata.normalize('NFKC', name or '')).lower()
+    return SYNONYMS.get(text, text)
+
+
+@lru_cache(maxsize=65536)
+def purchase_link_for(canonical_name, template=DEFAULT_LINK_TEMPLATE):
+    """Purchase link for a canonical ingredient, computed once per name and template."""
+    return template.format(query=urllib.parse.quote(canonical_name))
+
+
+def link_for_name(name, template=DEFAULT_LINK_TEMPLATE):
+    return purchase_link_for(normalize_ingredient_name(name), template)
+
+
+def backfill(batch_size=500):
+    """Attaches existing ingredient rows without a catalog_id to their catalog entries."""
+    import rate_limit
+    from clients import get_supabase
+    from db_stream import batched, iter_rows
+
+    # Linked rows drop out of the filter, which the keyset scan tolerates
+    rows = iter_rows('ingredients', 'id, name', where=lambda q: q.is_('catalog_id', 'null'), page_size=batch_size, prefetch=True)
+    total = 0
+    canonical_names = set()
+    for batch in batched(rows, batch_size):
+        entries = []
+        for ing in batch:
+            canonical = normalize_ingredient_name(ing['name'])
+            canonical_names.add(canonical)
+            entries.append({'id': ing['id'], 'canonical_name': canonical, 'purchase_link': purchase_link_for(canonical)})
+        rate_limit.call('supabase', get_supabase().rpc('link_ingredients_to_catalog', {'entries': entries}).execute)
+        total += len(entries)
+        print(f"Linked {total} ingredients...")
+
+    print(f"Done. Linked {total} ingredients to {len(canonical_names)} canonical names.")
+
+
+def check():
+    """Normalizes NORMALIZE_EXAMPLES and reports every mismatch. Returns True when all match."""
+    failures = 0
+    for name, expected in NORMALIZE_EXAMPLES.items():
+        got = normalize_ingredient_name(name)
+        if got != expected:
+            failures += 1
+            print(f"❌ {name!r} -> {got!r}, expected {expected!r}")
+    print(f"{'✅' if not failures else '❌'} {len(NORMALIZE_EXAMPLES) - failures}/{len(NORMALIZE_EXAMPLES)} names normalized as expected")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Canonical ingredient catalog tools')
+    parser.add_argument('--backfill', action='store_true', help='Attach existing ingredients to the catalog')
+    parser.add_argument('--normalize', nargs='+', metavar='NAME', help='Print the canonical name for each NAME')
+    parser.add_argument('--check', action='store_true', help='Check normalization against the known examples')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    if args.check:
+        raise SystemExit(0 if check() else 1)
+    elif args.normalize:
+        for name in args.normalize:
+            print(f"{name!r} -> {normalize_ingredient_name(name)!r}")
+    elif args.backfill:
+        backfill(args.batch_size)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
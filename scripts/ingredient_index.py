@@ -0,0 +1,341 @@
+import json
+import bisect
+import argparse
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from crawl_cache import SqliteCache
+from ingredient_catalog import normalize_ingredient_name
+
+RECIPE_CHUNK = 100
+# See export_recipe_documents.WATERMARK_OVERLAP
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def recipe_terms(names):
+    """Sorted canonical ingredient names of one recipe, without duplicates."""
+    return tuple(sorted({term for term in map(normalize_ingredient_name, names) if term}))
+
+
+def _bigrams(term):
+    return {term[i:i + 2] for i in range(len(term) - 1)}
+
+
+class IngredientIndex(SqliteCache):
+    """Inverted index from canonical ingredient name to the recipes using it.
+
+    Recipes get dense doc numbers; each term's posting list is a sorted
+    uint32 array, stored as a blob and held in memory for queries. Adding a
+    recipe only rewrites the posting lists of its own terms, and a recipe
+    that changes keeps its doc number. Removed recipes leave an empty doc
+    behind until the index is rebuilt.
+    """
+
+    SCHEMA = '''
+        create table if not exists docs (
+            doc integer primary key,
+            recipe_id text not null unique,
+            title text,
+            terms text not null
+        );
+        create table if not exists postings (
+            term text primary key,
+            docs blob not null
+        );
+        create table if not exists meta (
+            key text primary key,
+            value text not null
+        );
+    '''
+
+    def __init__(self, filename='ingredient_index.sqlite3'):
+        super().__init__(filename)
+        self.recipe_ids = []
+        self.titles = []
+        self.terms = []
+        self.doc_of = {}
+        self.postings = {}
+        self._grams = None
+        self._bitmaps = {}
+        self._sizes = None
+        self._dirty_docs = set()
+        self._dirty_terms = set()
+        self._load()
+
+    def _load(self):
+        for doc, recipe_id, title, terms in self._execute('select doc, recipe_id, title, terms from docs order by doc'):
+            self.recipe_ids.append(recipe_id)
+            self.titles.append(title)
+            self.terms.append(tuple(json.loads(terms)))
+            self.doc_of[recipe_id] = doc
+        for term, blob in self._execute('select term, docs from postings'):
+            docs = array('I')
+            docs.frombytes(blob)
+            self.postings[term] = docs
+
+    def clear(self):
+        """Empties the index, so a rebuild also compacts the doc numbers of removed recipes."""
+        self._execute('delete from docs')
+        self._execute('delete from postings')
+        self._execute('delete from meta')
+        self.recipe_ids, self.titles, self.terms = [], [], []
+        self.doc_of, self.postings = {}, {}
+        self._grams = None
+        self._bitmaps = {}
+        self._sizes = None
+        self._dirty_docs.clear()
+        self._dirty_terms.clear()
+
+    def __len__(self):
+        return sum(1 for terms in self.terms if terms)
+
+    def get_meta(self, key, default=None):
+        rows = self._execute('select value from meta where key = ?', (key,))
+        return rows[0][0] if rows else default
+
+    def set_meta(self, key, value):
+        self._execute('insert or replace into meta values (?, ?)', (key, value))
+
+    def _unlink(self, doc):
+        for term in self.terms[doc]:
+            docs = self.postings[term]
+            i = bisect.bisect_left(docs, doc)
+            if i < len(docs) and docs[i] == doc:
+                docs.pop(i)
+            self._dirty_terms.add(term)
+            self._bitmaps.pop(term, None)
+        self._sizes = None
+
+    def add(self, recipe_id, title, names):
+        """Indexes (or re-indexes) one recipe from its raw ingredient names."""
+        terms = recipe_terms(names)
+        doc = self.doc_of.get(recipe_id)
+        if doc is None:
+            doc = len(self.recipe_ids)
+            self.recipe_ids.append(recipe_id)
+            self.titles.append(title)
+            self.terms.append(())
+            self.doc_of[recipe_id] = doc
+        elif self.terms[doc] == terms and self.titles[doc] == title:
+            return
+        else:
+            self._unlink(doc)
+
+        self.titles[doc] = title
+        self.terms[doc] = terms
+        for term in terms:
+            docs = self.postings.get(term)
+            if docs is None:
+                docs = self.postings[term] = array('I')
+                if self._grams is not None:
+                    for gram in _bigrams(term):
+                        self._grams[gram].add(term)
+            # New docs have the highest number, so this is an append except on re-indexing
+            if not docs or docs[-1] < doc:
+                docs.append(doc)
+            else:
+                i = bisect.bisect_left(docs, doc)
+                if i == len(docs) or docs[i] != doc:
+                    docs.insert(i, doc)
+            self._dirty_terms.add(term)
+            self._bitmaps.pop(term, None)
+        self._dirty_docs.add(doc)
+        self._sizes = None
+
+    def remove(self, recipe_id):
+        doc = self.doc_of.get(recipe_id)
+        if doc is not None and self.terms[doc]:
+            self._unlink(doc)
+            self.terms[doc] = ()
+            self._dirty_docs.add(doc)
+
+    def save(self):
+        """Writes the docs and posting lists changed since the last save in one transaction."""
+        with self._lock:
+            self._conn.executemany(
+                'insert or replace into docs values (?, ?, ?, ?)',
+                [(doc, self.recipe_ids[doc], self.titles[doc], json.dumps(self.terms[doc], ensure_ascii=False))
+                 for doc in self._dirty_docs],
+            )
+            self._conn.executemany(
+                'insert or replace into postings values (?, ?)',
+                [(term, self.postings[term].tobytes()) for term in self._dirty_terms if self.postings[term]],
+            )
+            self._conn.executemany(
+                'delete from postings where term = ?',
+                [(term,) for term in self._dirty_terms if not self.postings[term]],
+            )
+            self._conn.commit()
+        for term in self._dirty_terms:
+            if not self.postings[term]:
+                del self.postings[term]
+                self._grams = None
+        self._dirty_docs.clear()
+        self._dirty_terms.clear()
+
+    def expand(self, name, partial=True):
+        """Index terms a query name stands for: its canonical form and, with partial,
+        terms containing it or contained in it ("고기" -> "돼지고기", "소고기")."""
+        query = normalize_ingredient_name(name)
+        found = {query} if query in self.postings else set()
+        if not partial or len(query) < 2:
+            return found
+        if self._grams is None:
+            self._grams = defaultdict(set)
+            for term in self.postings:
+                for gram in _bigrams(term):
+                    self._grams[gram].add(term)
+        candidates = set().union(*(self._grams.get(gram, ()) for gram in _bigrams(query)))
+        found.update(term for term in candidates if len(term) >= 2 and (query in term or term in query))
+        return found
+
+    def _bitmap(self, term):
+        """The term's posting list as an int with bit `doc` set, cached until the term changes."""
+        bitmap = self._bitmaps.get(term)
+        if bitmap is None:
+            bits = bytearray(len(self.recipe_ids) // 8 + 1)
+            for doc in self.postings[term]:
+                bits[doc >> 3] |= 1 << (doc & 7)
+            bitmap = self._bitmaps[term] = int.from_bytes(bits, 'little')
+        return bitmap
+
+    def _size_bitmaps(self):
+        """{ingredient count: bitmap of the docs with that many ingredients}, cached until a doc changes."""
+        if self._sizes is None:
+            sizes = defaultdict(lambda: bytearray(len(self.recipe_ids) // 8 + 1))
+            for doc, terms in enumerate(self.terms):
+                if terms:
+                    sizes[len(terms)][doc >> 3] |= 1 << (doc & 7)
+            self._sizes = {size: int.from_bytes(bits, 'little') for size, bits in sizes.items()}
+        return self._sizes
+
+    def search(self, have, limit=20, partial=True, min_coverage=0.0):
+        """Recipes ranked by the share of their ingredients covered by `have`.
+
+        Ties go to the recipe with more matched ingredients, then the newest.
+        Each result is a dict with recipe_id, title, coverage, matched, total
+        and missing.
+
+        Match counts are summed over posting bitmaps as bit-sliced counters
+        (bit j of every doc's count lives in counters[j]), so a query costs a
+        few big-int operations per wanted term instead of a step per posting.
+        """
+        wanted = set()
+        for name in have:
+            wanted |= self.expand(name, partial)
+
+        counters = []
+        for term in wanted:
+            carry = self._bitmap(term)
+            for j, counter in enumerate(counters):
+                counters[j], carry = counter ^ carry, counter & carry
+                if not carry:
+                    break
+            if carry:
+                counters.append(carry)
+        if not counters:
+            return []
+
+        everything = (1 << len(self.recipe_ids)) - 1
+        sizes = self._size_bitmaps()
+        ranked = []
+        # Best coverage first: walk (matched, total) pairs in score order and take docs from each
+        pairs = sorted(((count, total) for total in sizes for count in range(1, min(total, len(wanted)) + 1)
+                        if count / total >= min_coverage),
+                       key=lambda pair: (pair[0] / pair[1], pair[0]), reverse=True)
+        exact_counts = {}
+        for count, total in pairs:
+            if count not in exact_counts:
+                docs = everything
+                for j, counter in enumerate(counters):
+                    docs &= counter if count >> j & 1 else everything ^ counter
+                if count >> len(counters):
+                    docs = 0
+                exact_counts[count] = docs
+            docs = exact_counts[count] & sizes[total]
+            while docs and len(ranked) < limit:
+                doc = docs.bit_length() - 1
+                docs ^= 1 << doc
+                ranked.append((count / total, count, doc))
+            if len(ranked) >= limit:
+                break
+
+        return [
+            {
+                'recipe_id': self.recipe_ids[doc],
+                'title': self.titles[doc],
+                'coverage': round(coverage, 3),
+                'matched': count,
+                'total': len(self.terms[doc]),
+                'missing': [term for term in self.terms[doc] if term not in wanted],
+            }
+            for coverage, count, doc in ranked
+        ]
+
+
+def sync(index, rebuild=False):
+    """Indexes recipes changed in Supabase since the last sync (all of them with rebuild).
+
+    Changes are found through recipes.updated_at (migration_recipe_documents.sql).
+    Deleted recipes only leave the index on a rebuild, which starts from an empty index.
+    """
+    from db_stream import batched, iter_rows
+
+    if rebuild:
+        index.clear()
+    since = index.get_meta('updated_at')
+    if since:
+        since = (datetime.fromisoformat(since) - WATERMARK_OVERLAP).isoformat()
+    where = (lambda q: q.gte('updated_at', since)) if since else None
+    print("🔎 Indexing recipes " + (f"changed since {since}" if since else "(all)") + "...")
+
+    count = 0
+    rows = iter_rows('recipes', 'id, title, updated_at', where=where, key='updated_at', prefetch=True)
+    for recipes in batched(rows, RECIPE_CHUNK):
+        recipe_ids = [r['id'] for r in recipes]
+        names = defaultdict(list)
+        for row in iter_rows('ingredients', 'recipe_id, name', where=lambda q: q.in_('recipe_id', recipe_ids)):
+            names[row['recipe_id']].append(row['name'])
+        for r in recipes:
+            index.add(r['id'], r['title'], names[r['id']])
+        index.save()
+        # Rows come in updated_at order, so an interrupted sync resumes from here
+        index.set_meta('updated_at', recipes[-1]['updated_at'])
+        count += len(recipes)
+        print(f"  Indexed {count} recipes...")
+
+    print(f"Done. {len(index)} recipes, {len(index.postings)} ingredients in the index.")
+
+
+def print_results(results):
+    for i, r in enumerate(results, 1):
+        print(f"{i:>3}. {r['title']} ({r['matched']}/{r['total']}, {r['coverage']:.0%})")
+        if r['missing']:
+            print(f"     missing: {', '.join(r['missing'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline ingredient index: find recipes you can cook with what you have')
+    parser.add_argument('--sync', action='store_true', help='Index recipes changed since the last sync')
+    parser.add_argument('--rebuild', action='store_true', help='Re-index every recipe and drop deleted ones')
+    parser.add_argument('--query', nargs='+', metavar='INGREDIENT', help='Ingredients you have, e.g. 김치 두부 대파')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--exact', action='store_true', help='Match canonical names only, not partial names')
+    parser.add_argument('--min-coverage', type=float, default=0.0, help='Hide recipes covered less than this share (0-1)')
+    args = parser.parse_args(argv)
+
+    index = IngredientIndex()
+    try:
+        if args.sync or args.rebuild:
+            sync(index, rebuild=args.rebuild)
+        if args.query:
+            print_results(index.search(args.query, args.limit, partial=not args.exact, min_coverage=args.min_coverage))
+        elif not (args.sync or args.rebuild):
+            print(f"{len(index)} recipes, {len(index.postings)} ingredients in the index. Use --sync or --query.")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+-- Set-based purchase link rewrite: one statement per batch instead of one UPDATE per ingredient.
+-- Called by relink_ingredients.py with [{"id": ..., "purchase_link": ...}, ...].
+create or replace function set_purchase_links(updates jsonb)
+returns integer
+language sql
+as $$
+  with changed as (
+    update ingredients i
+    set purchase_link = u.purchase_link
+    from jsonb_to_recordset(updates) as u(id uuid, purchase_link text)
+    where i.id = u.id
+      and i.purchase_link is distinct from u.purchase_link
+    returning 1
+  )
+  select count(*)::integer from changed;
+$$;
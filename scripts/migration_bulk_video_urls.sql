@@ -0,0 +1,24 @@
+-- Set-based video URL rewrite, used by update_shorts_urls.py with
+-- [{"id": ..., "video_url": ..., "is_short": ...}, ...]; is_short may be null to keep the stored verdict.
+-- recipes has no update policy for the anon key the scripts use, so this runs as the table owner.
+--
+-- This is the only definition of set_video_urls(); it needs the is_short column of
+-- migration_video_format.sql, so apply this file after it.
+create or replace function set_video_urls(updates jsonb)
+returns integer
+language sql
+security definer
+set search_path = public
+as $$
+  with changed as (
+    update recipes r
+    set video_url = u.video_url,
+        is_short = coalesce(u.is_short, r.is_short)
+    from jsonb_to_recordset(updates) as u(id uuid, video_url text, is_short boolean)
+    where r.id = u.id
+      and (r.video_url is distinct from u.video_url
+           or r.is_short is distinct from coalesce(u.is_short, r.is_short))
+    returning 1
+  )
+  select count(*)::integer from changed;
+$$;
@@ -0,0 +1,72 @@
+-- Indexes for the foreign keys and orderings the site and scripts query by,
+-- and like/save counts kept on recipes so popularity needs no count(*).
+-- Requires migration_likes.sql and migration_saves.sql.
+-- scripts/bench_db_indexes.py measures the queries before and after this migration.
+
+-- Chef pages: .eq('chef_id', ...).order('created_at', desc); also serves the chef_id FK
+create index if not exists recipes_chef_id_created_at_idx on recipes (chef_id, created_at desc);
+-- Home page: latest recipes
+create index if not exists recipes_created_at_idx on recipes (created_at desc);
+-- Recipe pages and .in_('recipe_id', chunk); also makes `on delete cascade` from recipes cheap
+create index if not exists ingredients_recipe_id_idx on ingredients (recipe_id);
+create index if not exists steps_recipe_id_step_order_idx on steps (recipe_id, step_order);
+-- unique(user_id, recipe_id) only helps lookups by user
+create index if not exists recipe_likes_recipe_id_idx on recipe_likes (recipe_id);
+create index if not exists recipe_saves_recipe_id_idx on recipe_saves (recipe_id);
+
+alter table recipes add column if not exists like_count integer not null default 0;
+alter table recipes add column if not exists save_count integer not null default 0;
+
+-- Runs as the table owner: users may like a recipe but not update recipes directly
+create or replace function update_recipe_like_count()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if tg_op = 'INSERT' then
+    update recipes set like_count = like_count + 1 where id = new.recipe_id;
+  else
+    update recipes set like_count = greatest(like_count - 1, 0) where id = old.recipe_id;
+  end if;
+  return null;
+end;
+$$;
+
+create or replace function update_recipe_save_count()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if tg_op = 'INSERT' then
+    update recipes set save_count = save_count + 1 where id = new.recipe_id;
+  else
+    update recipes set save_count = greatest(save_count - 1, 0) where id = old.recipe_id;
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists recipe_likes_count on recipe_likes;
+create trigger recipe_likes_count
+after insert or delete on recipe_likes
+for each row execute function update_recipe_like_count();
+
+drop trigger if exists recipe_saves_count on recipe_saves;
+create trigger recipe_saves_count
+after insert or delete on recipe_saves
+for each row execute function update_recipe_save_count();
+
+-- Backfill after the triggers exist, so likes made while this runs are not lost
+update recipes r
+set like_count = c.n
+from (select recipe_id, count(*) as n from recipe_likes group by recipe_id) c
+where c.recipe_id = r.id;
+
+update recipes r
+set save_count = c.n
+from (select recipe_id, count(*) as n from recipe_saves group by recipe_id) c
+where c.recipe_id = r.id;
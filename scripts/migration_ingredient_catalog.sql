@@ -0,0 +1,78 @@
+-- Canonical ingredient catalog: one row per thing you can buy, referenced by every ingredient row.
+-- Purchase links live on the catalog entry; ingredients.purchase_link is kept as a copy for the site.
+create table if not exists ingredient_catalog (
+  id uuid default gen_random_uuid() primary key,
+  name text not null unique, -- normalized by scripts/ingredient_catalog.py
+  purchase_link text not null,
+  created_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+alter table ingredient_catalog enable row level security;
+drop policy if exists "Allow public read access" on ingredient_catalog;
+create policy "Allow public read access" on ingredient_catalog for select using (true);
+drop policy if exists "Allow public insert access" on ingredient_catalog;
+create policy "Allow public insert access" on ingredient_catalog for insert with check (true);
+
+alter table ingredients add column if not exists catalog_id uuid references ingredient_catalog(id) on delete set null;
+create index if not exists ingredients_catalog_id_idx on ingredients (catalog_id);
+
+-- save_recipe() in migration_save_recipe.sql links each ingredient's canonical_name to a
+-- catalog entry; re-apply it after this file.
+
+-- Backfill: [{"id": ingredient id, "canonical_name": ..., "purchase_link": ...}, ...]
+-- ingredients and ingredient_catalog have no update policy for the anon key the scripts use,
+-- so the relink RPCs run as the table owner.
+create or replace function link_ingredients_to_catalog(entries jsonb)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  linked integer;
+begin
+  insert into ingredient_catalog (name, purchase_link)
+  select distinct on (e.canonical_name) e.canonical_name, e.purchase_link
+  from jsonb_to_recordset(entries) as e(id uuid, canonical_name text, purchase_link text)
+  on conflict (name) do nothing;
+
+  update ingredients i
+  set catalog_id = c.id,
+      purchase_link = c.purchase_link
+  from jsonb_to_recordset(entries) as e(id uuid, canonical_name text, purchase_link text)
+  join ingredient_catalog c on c.name = e.canonical_name
+  where i.id = e.id;
+
+  get diagnostics linked = row_count;
+  return linked;
+end;
+$$;
+
+-- Relink by template: rewrite the catalog ([{"id": catalog id, "purchase_link": ...}, ...])
+-- and copy the new links onto every ingredient row that references those entries.
+create or replace function set_catalog_links(updates jsonb)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  changed integer;
+begin
+  update ingredient_catalog c
+  set purchase_link = u.purchase_link
+  from jsonb_to_recordset(updates) as u(id uuid, purchase_link text)
+  where c.id = u.id
+    and c.purchase_link is distinct from u.purchase_link;
+
+  update ingredients i
+  set purchase_link = c.purchase_link
+  from jsonb_to_recordset(updates) as u(id uuid, purchase_link text)
+  join ingredient_catalog c on c.id = u.id
+  where i.catalog_id = c.id
+    and i.purchase_link is distinct from c.purchase_link;
+
+  get diagnostics changed = row_count;
+  return changed;
+end;
+$$;
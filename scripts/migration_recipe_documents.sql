@@ -0,0 +1,166 @@
+-- Precomputed recipe pages, written by export_recipe_documents.py.
+-- recipe_documents holds one denormalized document per recipe (the recipe row,
+-- its chef, ingredients and ordered steps); chef_recipe_index holds each chef's
+-- recipe listing, newest first, split into shards of a fixed size.
+-- recipes.updated_at moves whenever a recipe, its ingredients or its steps change,
+-- so the exporter only rebuilds what changed since its last run.
+-- Requires migration_video_format.sql and migration_indexes_counters.sql.
+
+alter table recipes add column if not exists updated_at timestamp with time zone default timezone('utc'::text, now()) not null;
+
+create index if not exists recipes_updated_at_idx on recipes (updated_at, id);
+-- The chef page checks its shards against the chef's newest recipes.updated_at
+create index if not exists recipes_chef_id_updated_at_idx on recipes (chef_id, updated_at desc);
+
+-- Like and save counters change constantly and are not part of the document
+create or replace function touch_recipe_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  if (to_jsonb(new) - 'like_count' - 'save_count' - 'updated_at')
+     is distinct from (to_jsonb(old) - 'like_count' - 'save_count' - 'updated_at') then
+    new.updated_at := now();
+  end if;
+  return new;
+end;
+$$;
+
+drop trigger if exists recipes_touch_updated_at on recipes;
+create trigger recipes_touch_updated_at
+before update on recipes
+for each row execute function touch_recipe_updated_at();
+
+-- Statement-level, so a bulk relink touches each recipe once rather than once per ingredient.
+-- Recipes already touched in this transaction (e.g. just created by save_recipe) are skipped.
+-- Runs as the table owner: the scripts' anon key may write ingredients but not update recipes.
+create or replace function touch_parent_recipes()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if tg_op = 'DELETE' then
+    update recipes set updated_at = now()
+    where id in (select distinct recipe_id from old_rows) and updated_at < now();
+  else
+    update recipes set updated_at = now()
+    where id in (select distinct recipe_id from new_rows) and updated_at < now();
+  end if;
+  return null;
+end;
+$$;
+
+-- Transition tables allow one event per trigger
+drop trigger if exists ingredients_touch_recipe_insert on ingredients;
+create trigger ingredients_touch_recipe_insert
+after insert on ingredients referencing new table as new_rows
+for each statement execute function touch_parent_recipes();
+
+drop trigger if exists ingredients_touch_recipe_update on ingredients;
+create trigger ingredients_touch_recipe_update
+after update on ingredients referencing new table as new_rows
+for each statement execute function touch_parent_recipes();
+
+drop trigger if exists ingredients_touch_recipe_delete on ingredients;
+create trigger ingredients_touch_recipe_delete
+after delete on ingredients referencing old table as old_rows
+for each statement execute function touch_parent_recipes();
+
+drop trigger if exists steps_touch_recipe_insert on steps;
+create trigger steps_touch_recipe_insert
+after insert on steps referencing new table as new_rows
+for each statement execute function touch_parent_recipes();
+
+drop trigger if exists steps_touch_recipe_update on steps;
+create trigger steps_touch_recipe_update
+after update on steps referencing new table as new_rows
+for each statement execute function touch_parent_recipes();
+
+drop trigger if exists steps_touch_recipe_delete on steps;
+create trigger steps_touch_recipe_delete
+after delete on steps referencing old table as old_rows
+for each statement execute function touch_parent_recipes();
+
+create table if not exists recipe_documents (
+  recipe_id uuid primary key references recipes(id) on delete cascade,
+  chef_id uuid references chefs(id) on delete cascade not null,
+  doc jsonb not null,
+  source_updated_at timestamp with time zone not null, -- recipes.updated_at the document was built from
+  exported_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+create index if not exists recipe_documents_source_updated_at_idx on recipe_documents (source_updated_at);
+
+create table if not exists chef_recipe_index (
+  chef_id uuid references chefs(id) on delete cascade not null,
+  shard integer not null, -- 0 holds the newest recipes
+  recipes jsonb not null,
+  recipe_count integer not null, -- across all shards of the chef
+  exported_at timestamp with time zone default timezone('utc'::text, now()) not null,
+  primary key (chef_id, shard)
+);
+-- Newest recipes.updated_at the shards were built from; the chef page falls back to a live query past it
+alter table chef_recipe_index add column if not exists source_updated_at timestamp with time zone;
+
+alter table recipe_documents enable row level security;
+alter table chef_recipe_index enable row level security;
+drop policy if exists "Allow public read access" on recipe_documents;
+create policy "Allow public read access" on recipe_documents for select using (true);
+drop policy if exists "Allow public read access" on chef_recipe_index;
+create policy "Allow public read access" on chef_recipe_index for select using (true);
+
+-- Called with [{"recipe_id", "chef_id", "doc", "source_updated_at"}, ...].
+-- Documents of recipes deleted since they were read are dropped.
+-- Both tables are read-only to the anon key the exporter uses, so the writers run as the table owner.
+create or replace function save_recipe_documents(docs jsonb)
+returns integer
+language sql
+security definer
+set search_path = public
+as $$
+  with saved as (
+    insert into recipe_documents (recipe_id, chef_id, doc, source_updated_at)
+    select d.recipe_id, d.chef_id, d.doc, d.source_updated_at
+    from jsonb_to_recordset(docs) as d(recipe_id uuid, chef_id uuid, doc jsonb, source_updated_at timestamptz)
+    where exists (select 1 from recipes r where r.id = d.recipe_id)
+    on conflict (recipe_id) do update
+    set chef_id = excluded.chef_id,
+        doc = excluded.doc,
+        source_updated_at = excluded.source_updated_at,
+        exported_at = timezone('utc'::text, now())
+    returning 1
+  )
+  select count(*)::integer from saved;
+$$;
+
+-- Replaces every shard of one chef; shards is a JSON array of arrays of listing entries.
+-- An empty array removes the chef's index (e.g. after all their recipes were deleted).
+drop function if exists save_chef_recipe_index(uuid, jsonb);
+create or replace function save_chef_recipe_index(target_chef_id uuid, shards jsonb, source_updated_at timestamptz)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  total integer;
+begin
+  select coalesce(sum(jsonb_array_length(value)), 0) into total from jsonb_array_elements(shards);
+
+  delete from chef_recipe_index
+  where chef_id = target_chef_id and shard >= jsonb_array_length(shards);
+
+  insert into chef_recipe_index (chef_id, shard, recipes, recipe_count, source_updated_at)
+  select target_chef_id, (s.ordinality - 1)::integer, s.value, total, save_chef_recipe_index.source_updated_at
+  from jsonb_array_elements(shards) with ordinality as s(value, ordinality)
+  on conflict (chef_id, shard) do update
+  set recipes = excluded.recipes,
+      recipe_count = excluded.recipe_count,
+      source_updated_at = excluded.source_updated_at,
+      exported_at = timezone('utc'::text, now());
+
+  return jsonb_array_length(shards);
+end;
+$$;
@@ -0,0 +1,52 @@
+-- Save a whole recipe document (recipe + ingredients + steps) in one transaction.
+-- Called by crawl_channel.py via supabase.rpc('save_recipe', {'doc': ...}).
+-- A duplicate video_id raises unique_violation (23505) and nothing is written.
+-- Each ingredient's canonical_name is resolved to an ingredient_catalog entry, whose
+-- link wins over the one sent by the crawler, so relinking the catalog is authoritative.
+--
+-- This is the only definition of save_recipe(). Migrations that change what it
+-- writes change it here and say so; apply this file after them (it needs the
+-- columns of migration_ingredient_catalog.sql and migration_video_format.sql).
+create or replace function save_recipe(doc jsonb)
+returns uuid
+language plpgsql
+as $$
+declare
+  new_id uuid;
+begin
+  insert into recipes (title, chef_id, image_url, time, calories, protein, fat, carbs, is_recommended, video_url, video_id, duration, is_short)
+  values (
+    doc->>'title',
+    (doc->>'chef_id')::uuid,
+    doc->>'image_url',
+    doc->>'time',
+    (doc->>'calories')::integer,
+    doc->>'protein',
+    doc->>'fat',
+    doc->>'carbs',
+    coalesce((doc->>'is_recommended')::boolean, false),
+    doc->>'video_url',
+    doc->>'video_id',
+    (doc->>'duration')::integer,
+    (doc->>'is_short')::boolean
+  )
+  returning id into new_id;
+
+  insert into ingredient_catalog (name, purchase_link)
+  select distinct on (i->>'canonical_name') i->>'canonical_name', i->>'purchase_link'
+  from jsonb_array_elements(coalesce(doc->'ingredients', '[]'::jsonb)) as i
+  where i->>'canonical_name' is not null
+  on conflict (name) do nothing;
+
+  insert into ingredients (recipe_id, name, amount, purchase_link, catalog_id)
+  select new_id, i->>'name', i->>'amount', coalesce(c.purchase_link, i->>'purchase_link'), c.id
+  from jsonb_array_elements(coalesce(doc->'ingredients', '[]'::jsonb)) as i
+  left join ingredient_catalog c on c.name = i->>'canonical_name';
+
+  insert into steps (recipe_id, step_order, description)
+  select new_id, (s->>'step_order')::integer, s->>'description'
+  from jsonb_array_elements(coalesce(doc->'steps', '[]'::jsonb)) as s;
+
+  return new_id;
+end;
+$$;
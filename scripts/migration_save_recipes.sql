@@ -0,0 +1,28 @@
+-- Batch variant of save_recipe(): writes many recipe documents in one request.
+-- The whole batch is one transaction, except that a doc whose video_id already
+-- exists is not written again: it is reported with the stored recipe's id and
+-- created = false instead of failing the batch. That also makes a retried call
+-- safe when the first one committed but its response was lost.
+-- Requires migration_save_recipe.sql.
+drop function if exists save_recipes(jsonb);
+create function save_recipes(docs jsonb)
+returns table (video_id text, recipe_id uuid, created boolean)
+language plpgsql
+as $$
+declare
+  doc jsonb;
+begin
+  for doc in select * from jsonb_array_elements(docs)
+  loop
+    video_id := doc->>'video_id';
+    begin
+      recipe_id := save_recipe(doc);
+      created := true;
+    exception when unique_violation then
+      select r.id into recipe_id from recipes r where r.video_id = doc->>'video_id';
+      created := false;
+    end;
+    return next;
+  end loop;
+end;
+$$;
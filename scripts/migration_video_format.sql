@@ -0,0 +1,11 @@
+-- Video format captured at listing time by crawl_channel.py.
+-- is_short is null when the listing could not tell (e.g. a plain playlist);
+-- update_shorts_urls.py probes only those rows.
+alter table recipes add column if not exists duration integer; -- seconds
+alter table recipes add column if not exists is_short boolean;
+
+update recipes set is_short = true where is_short is null and video_url like '%/shorts/%';
+
+-- save_recipe() in migration_save_recipe.sql writes duration and is_short; re-apply it after this file.
+
+-- set_video_urls() in migration_bulk_video_urls.sql records the probed is_short; re-apply it after this file.
@@ -0,0 +1,21 @@
+-- Add a normalized YouTube video ID to recipes for O(1) duplicate checks
+alter table recipes add column if not exists video_id text;
+
+-- Backfill from both watch?v= and /shorts/ URLs
+update recipes
+set video_id = substring(video_url from '(?:[?&]v=|/shorts/|youtu\.be/|/embed/)([A-Za-z0-9_-]{11})')
+where video_id is null;
+
+-- Existing duplicates keep the ID only on their oldest row so the unique index can be built
+update recipes set video_id = null
+where id in (
+  select id from (
+    select id, row_number() over (partition by video_id order by created_at) as rn
+    from recipes
+    where video_id is not null
+  ) d
+  where d.rn > 1
+);
+
+-- Lets the database reject races between concurrent crawlers
+create unique index if not exists recipes_video_id_key on recipes (video_id);
@@ -0,0 +1,208 @@
+import os
+import re
+import time
+import random
+import threading
+
+from clients import load_config
+
+
+def _config(backend):
+    """Requests per second (and Gemini tokens per minute) per backend, overridable from .env.local.
+
+    Read when the limiter is first used, after clients.load_config() has read .env.local.
+    """
+    if backend == 'gemini':
+        return float(os.getenv('GEMINI_RPM', '60')) / 60, float(os.getenv('GEMINI_TPM', '1000000'))
+    if backend == 'youtube':
+        return float(os.getenv('YOUTUBE_RPS', '5')), None
+    if backend == 'supabase':
+        return float(os.getenv('SUPABASE_RPS', '20')), None
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+_RATE_LIMITED_RE = re.compile(r'\b429\b|too many requests|resource[ _](has been )?exhausted|rate limit|per ?minute', re.I)
+# Which quota a 429 / RESOURCE_EXHAUSTED hit, from the quota IDs and reasons in the error details
+# (e.g. quota_id: "GenerateRequestsPerDayPerProjectPerModel-FreeTier"). The free text is the same
+# for every Gemini quota ("...check your plan and billing details"), so it decides nothing.
+_PER_MINUTE_QUOTA_RE = re.compile(r'PerMinute')
+_DAILY_QUOTA_RE = re.compile(r'PerDay|quotaExceeded|dailyLimitExceeded')
+_TRANSIENT_RE = re.compile(r'\b50[0234]\b|service unavailable|bad gateway|internal error|timed? ?out|connection (reset|aborted|refused)', re.I)
+
+
+def _status_of(error):
+    for candidate in (error, getattr(error, 'response', None)):
+        if candidate is None:
+            continue
+        for attr in ('status_code', 'code', 'status'):
+            value = getattr(candidate, attr, None)
+            if isinstance(value, int):
+                return value
+            if isinstance(value, str) and value.isdigit():
+                return int(value)
+    return None
+
+
+def classify_error(error):
+    """Returns 'rate_limited', 'transient' or None (not worth retrying).
+
+    A daily quota resets hours later, so it is not retried; when a per-minute
+    quota was hit as well, waiting does help and the per-minute signal wins.
+    """
+    status = _status_of(error)
+    message = str(error)
+    if _PER_MINUTE_QUOTA_RE.search(message):
+        return 'rate_limited'
+    if _DAILY_QUOTA_RE.search(message):
+        return None
+    if status == 429 or _RATE_LIMITED_RE.search(message):
+        return 'rate_limited'
+    if status in _RETRYABLE_STATUS or isinstance(error, (TimeoutError, ConnectionError)) or _TRANSIENT_RE.search(message):
+        return 'transient'
+    return None
+
+
+def _retry_after(error):
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Classic token bucket; acquire() blocks until enough tokens are available."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(min(wait, 1.0))
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+
+_observers = []
+
+
+def add_observer(fn):
+    """Registers fn(backend, event) for every 'request' attempt and every 'retry' (see crawl_metrics)."""
+    _observers.append(fn)
+
+
+def remove_observer(fn):
+    if fn in _observers:
+        _observers.remove(fn)
+
+
+def _notify(backend, event):
+    for fn in list(_observers):
+        fn(backend, event)
+
+
+class AdaptiveLimiter:
+    """Per-backend request budget that adapts to the quota it actually gets.
+
+    Requests go through a token bucket. A 429 halves the rate, and every
+    success adds back a small step up to the configured maximum (AIMD), so
+    throughput settles just under the real quota. Rate-limited and transient
+    (5xx, timeout) failures are retried with exponential backoff and jitter.
+    """
+
+    def __init__(self, name, rate, tokens_per_minute=None, max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.name = name
+        self.max_rate = rate
+        self.min_rate = rate / 20
+        self.requests = TokenBucket(rate)
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        return self.requests.rate
+
+    def _on_success(self):
+        with self._lock:
+            if self.requests.rate < self.max_rate:
+                self.requests.set_rate(min(self.max_rate, self.requests.rate + self.max_rate * 0.05))
+
+    def _on_rate_limited(self):
+        with self._lock:
+            self.requests.set_rate(max(self.min_rate, self.requests.rate / 2))
+
+    def call(self, fn, *args, tokens=0, **kwargs):
+        """Calls fn(*args, **kwargs) within the budget, retrying retryable failures."""
+        attempt = 0
+        while True:
+            self.requests.acquire()
+            if self.tokens is not None and tokens:
+                self.tokens.acquire(tokens)
+            _notify(self.name, 'request')
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind is None or attempt >= self.max_retries:
+                    raise
+                if kind == 'rate_limited':
+                    self._on_rate_limited()
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                _notify(self.name, 'retry')
+                delay = _retry_after(e) or min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                continue
+            self._on_success()
+            return result
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(backend):
+    """Returns the process-wide limiter for 'gemini', 'youtube' or 'supabase'."""
+    with _limiters_lock:
+        if backend not in _limiters:
+            load_config()
+            # RATE_LIMIT_SCALE divides the budget, e.g. between worker processes sharing one quota
+            scale = float(os.getenv('RATE_LIMIT_SCALE', '1')) or 1
+            rate, tpm = _config(backend)
+            _limiters[backend] = AdaptiveLimiter(
+                backend,
+                rate / scale,
+                tokens_per_minute=tpm / scale if tpm else None,
+            )
+        return _limiters[backend]
+
+
+def call(backend, fn, *args, **kwargs):
+    """Shorthand for get_limiter(backend).call(fn, ...)."""
+    return get_limiter(backend).call(fn, *args, **kwargs)
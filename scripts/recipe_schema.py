@@ -0,0 +1,127 @@
+import re
+import json
+
+# One schema for every extraction path (transcript, transcript chunks, audio).
+# Passed to Gemini as `response_schema`, and used by validate_recipe() below.
+RECIPE_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'title': {'type': 'STRING'},
+        'description': {'type': 'STRING'},
+        'ingredients': {
+            'type': 'ARRAY',
+            'items': {
+                'type': 'OBJECT',
+                'properties': {
+                    'name': {'type': 'STRING'},
+                    'amount': {'type': 'STRING'},
+                },
+                'required': ['name', 'amount'],
+            },
+        },
+        'steps': {
+            'type': 'ARRAY',
+            'items': {
+                'type': 'OBJECT',
+                'properties': {
+                    'order': {'type': 'INTEGER'},
+                    'description': {'type': 'STRING'},
+                },
+                'required': ['order', 'description'],
+            },
+        },
+        'time': {'type': 'STRING'},
+        'calories': {'type': 'INTEGER'},
+        'nutrition': {
+            'type': 'OBJECT',
+            'properties': {
+                'calories': {'type': 'INTEGER'},
+                'protein': {'type': 'STRING'},
+                'fat': {'type': 'STRING'},
+                'carbs': {'type': 'STRING'},
+            },
+            'required': ['protein', 'fat', 'carbs'],
+        },
+        'is_recipe': {'type': 'BOOLEAN'},
+    },
+    'required': ['title', 'ingredients', 'steps', 'time', 'calories', 'nutrition', 'is_recipe'],
+}
+
+# First number in a string, thousands separators allowed: "약 1,200kcal", "500-600kcal" -> 500.
+_NUMBER_RE = re.compile(r'\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?')
+
+
+def _coerce(value, type_):
+    """Fixes harmless type slips ("500" for 500, 3 for "3") instead of rejecting the whole response."""
+    if type_ == 'STRING' and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if type_ == 'INTEGER':
+        if isinstance(value, float):
+            return int(round(value))
+        if isinstance(value, str):
+            # Ranges keep their lower bound; stitching all digits together would turn "400~500" into 400500
+            match = _NUMBER_RE.search(value)
+            if match:
+                return int(round(float(match.group().replace(',', ''))))
+    return value
+
+
+def _validate(value, schema, path, errors):
+    type_ = schema['type']
+    value = _coerce(value, type_)
+
+    if type_ == 'OBJECT':
+        if not isinstance(value, dict):
+            errors.append(f"{path or 'root'}: expected object")
+            return value
+        for key in schema.get('required', []):
+            if value.get(key) is None:
+                errors.append(f"{path}.{key}: missing" if path else f"{key}: missing")
+        for key, sub in schema.get('properties', {}).items():
+            if value.get(key) is not None:
+                value[key] = _validate(value[key], sub, f"{path}.{key}" if path else key, errors)
+    elif type_ == 'ARRAY':
+        if not isinstance(value, list):
+            errors.append(f"{path}: expected array")
+            return value
+        return [_validate(item, schema['items'], f"{path}[{i}]", errors) for i, item in enumerate(value)]
+    elif type_ == 'STRING' and not isinstance(value, str):
+        errors.append(f"{path}: expected string")
+    elif type_ == 'INTEGER' and (not isinstance(value, int) or isinstance(value, bool)):
+        errors.append(f"{path}: expected integer")
+    elif type_ == 'BOOLEAN' and not isinstance(value, bool):
+        errors.append(f"{path}: expected boolean")
+    return value
+
+
+def validate_recipe(data):
+    """Returns (recipe, errors). A non-recipe verdict only needs `is_recipe: false`."""
+    if isinstance(data, list):
+        data = data[0] if data else None
+    if not isinstance(data, dict):
+        return None, ['root: expected object']
+    if data.get('is_recipe') is False:
+        return data, []
+
+    # Step numbers are implied by position; fill them in rather than asking for a repair
+    steps = data.get('steps')
+    if isinstance(steps, list):
+        for i, step in enumerate(steps):
+            if isinstance(step, dict) and step.get('order') is None:
+                step['order'] = i + 1
+
+    errors = []
+    data = _validate(data, RECIPE_SCHEMA, '', errors)
+    return data, errors
+
+
+def parse_recipe(text):
+    """Parses a model response into (recipe, errors). Tolerates markdown fences around the JSON."""
+    text = (text or '').strip()
+    if text.startswith('```'):
+        text = text.replace('```json', '').replace('```', '').strip()
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        return None, [f"invalid JSON: {e}"]
+    return validate_recipe(data)
@@ -0,0 +1,130 @@
+import argparse
+
+import rate_limit
+from chef_lookup import resolve_chefs
+from clients import get_supabase
+from db_stream import batched, iter_rows
+from ingredient_catalog import DEFAULT_LINK_TEMPLATE, link_for_name, purchase_link_for
+
+DEFAULT_TEMPLATE = DEFAULT_LINK_TEMPLATE
+
+RECIPE_CHUNK = 100
+
+
+def build_link(name, template):
+    """Links by canonical catalog name, so "진간장 2큰술" and "간장" share one search."""
+    return link_for_name(name, template)
+
+
+def fetch_recipe_ids(chef_id):
+    for row in iter_rows('recipes', 'id', where=lambda q: q.eq('chef_id', chef_id), prefetch=True):
+        yield row['id']
+
+
+def fetch_ingredients(recipe_ids):
+    for chunk in batched(recipe_ids, RECIPE_CHUNK):
+        yield from iter_rows('ingredients', 'id, name, purchase_link', where=lambda q, chunk=chunk: q.in_('recipe_id', chunk))
+
+
+def fetch_catalog():
+    return iter_rows('ingredient_catalog', 'id, name, purchase_link', prefetch=True)
+
+
+def write_links(rpc, updates):
+    res = rate_limit.call('supabase', get_supabase().rpc(rpc, {'updates': updates}).execute)
+    return res.data or 0
+
+
+def relink_catalog(args):
+    """Rewrites catalog links; set_catalog_links() copies them onto every linked ingredient."""
+    scanned = 0
+    changed = 0
+    updated = 0
+    updates = []
+    for entry in fetch_catalog():
+        scanned += 1
+        new_link = purchase_link_for(entry['name'], args.template)
+        if new_link == entry['purchase_link']:
+            continue
+        changed += 1
+        if changed <= args.show:
+            print(f"  [{entry['name']}]")
+            print(f"  - {entry['purchase_link']}")
+            print(f"  + {new_link}")
+        if args.dry_run:
+            continue
+        updates.append({'id': entry['id'], 'purchase_link': new_link})
+        if len(updates) >= args.batch_size:
+            updated += write_links('set_catalog_links', updates)
+            updates = []
+    if updates:
+        updated += write_links('set_catalog_links', updates)
+
+    print(f"Done. Scanned {scanned} catalog entries, changed {changed}" + (" (dry run)." if args.dry_run else f", updated {updated} ingredients."))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rewrite ingredient purchase links in bulk')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--chef', action='append', default=[], help='Chef UUID or name (repeatable)')
+    target.add_argument('--all', action='store_true', help='Relink every chef')
+    target.add_argument('--catalog', action='store_true', help='Relink the ingredient catalog (and every ingredient linked to it)')
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE, help='Link template; {query} is the URL-encoded canonical ingredient name')
+    parser.add_argument('--dry-run', action='store_true', help='Show the changes without writing them')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk update request')
+    parser.add_argument('--show', type=int, default=20, help='Changed rows to print as a diff')
+    args = parser.parse_args(argv)
+
+    if '{query}' not in args.template:
+        print("❌ Template must contain {query}")
+        return
+
+    if args.catalog:
+        relink_catalog(args)
+        return
+
+    chefs = resolve_chefs(args.chef, args.all)
+    if not chefs:
+        print("Chef not found")
+        return
+
+    total_scanned = 0
+    total_changed = 0
+    total_updated = 0
+    shown = 0
+
+    for chef in chefs:
+        print(f"Chef {chef['name']}...")
+
+        # Written every batch_size changes, so memory stays flat however big the chef is
+        changed = 0
+        updates = []
+        for ing in fetch_ingredients(fetch_recipe_ids(chef['id'])):
+            total_scanned += 1
+            new_link = build_link(ing['name'], args.template)
+            if new_link == ing['purchase_link']:
+                continue
+            changed += 1
+            if shown < args.show:
+                print(f"  [{ing['name']}]")
+                print(f"  - {ing['purchase_link']}")
+                print(f"  + {new_link}")
+                shown += 1
+            if args.dry_run:
+                continue
+            updates.append({'id': ing['id'], 'purchase_link': new_link})
+            if len(updates) >= args.batch_size:
+                total_updated += write_links('set_purchase_links', updates)
+                updates = []
+        if updates:
+            total_updated += write_links('set_purchase_links', updates)
+
+        total_changed += changed
+        if not args.dry_run:
+            print(f"  Updated {changed} ingredients.")
+
+    print(f"Done. Scanned {total_scanned}, changed {total_changed}" + (" (dry run)." if args.dry_run else f", updated {total_updated}."))
+
+
+if __name__ == "__main__":
+    main()
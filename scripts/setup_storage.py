@@ -1,23 +1,9 @@
-import os
-import sys
-from dotenv import load_dotenv
-from supabase import create_client, Client
-
-# Load environment variables
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
-
-if not all([SUPABASE_URL, SUPABASE_KEY]):
-    print("❌ Error: Missing environment variables. Check .env.local")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from clients import get_supabase
 
 BUCKET_NAME = 'images'
 
 def setup_storage():
+    supabase = get_supabase()
     print(f"Setting up Supabase Storage Bucket: '{BUCKET_NAME}'...")
     
     try:
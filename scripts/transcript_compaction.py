@@ -0,0 +1,106 @@
+import re
+
+# Spoken fillers that carry no recipe information.
+FILLER_WORDS = {
+    '음', '음.', '음,', '어', '어.', '어,', '아', '아.', '아,', '에', '에,', '으', '흠', '엄',
+    '그', '뭐', '막', '네', '네.', '네,',
+    'um', 'uh', 'uhm', 'hmm', 'er', 'ah',
+}
+
+# Auto-caption annotations such as [음악], [박수], [Music].
+_ANNOTATION_RE = re.compile(r'^\[[^\]]{1,20}\]$')
+
+# Longest word sequence checked for immediate repetition.
+MAX_REPEAT_WORDS = 12
+
+# Rough Korean caption density for budgeting without a count_tokens round trip.
+CHARS_PER_TOKEN = 2
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def compact_transcript(text):
+    """Drops fillers and caption annotations, and collapses immediately repeated word runs.
+
+    Auto-generated captions often repeat the same fragment two or three times
+    as the recognizer revises itself ("소금을 소금을 넣어 소금을 넣어 주세요").
+    """
+    words = [w for w in text.split() if w.lower() not in FILLER_WORDS and not _ANNOTATION_RE.match(w)]
+
+    out = []
+    i = 0
+    while i < len(words):
+        skipped = False
+        for n in range(min(MAX_REPEAT_WORDS, len(out), len(words) - i), 0, -1):
+            if words[i:i + n] == out[-n:]:
+                i += n
+                skipped = True
+                break
+        if not skipped:
+            out.append(words[i])
+            i += 1
+    return ' '.join(out)
+
+
+def split_transcript(text, max_tokens, overlap_words=20):
+    """Splits text on word boundaries into chunks of at most ~max_tokens.
+
+    Neighbouring chunks share `overlap_words` words so a step cut in half
+    is still readable on one side.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    words = text.split()
+    chunks = []
+    start = 0
+    while start < len(words):
+        end = start
+        size = 0
+        while end < len(words) and (size + len(words[end]) + 1 <= max_chars or end == start):
+            size += len(words[end]) + 1
+            end += 1
+        chunks.append(' '.join(words[start:end]))
+        if end >= len(words):
+            break
+        start = max(end - overlap_words, start + 1)
+    return chunks
+
+
+def _norm(text):
+    return re.sub(r'\s+', '', str(text or '')).lower()
+
+
+def merge_recipes(parts):
+    """Merges per-chunk extractions (in transcript order) into one recipe.
+
+    Metadata comes from the first chunk that found a recipe; ingredients are
+    deduplicated by name, steps keep their order, drop exact repeats from the
+    chunk overlap, and are renumbered.
+    """
+    recipes = [p for p in parts if p and p.get('is_recipe')]
+    if not recipes:
+        return parts[0] if parts else None
+
+    merged = dict(recipes[0])
+    ingredients = []
+    seen_ingredients = set()
+    steps = []
+    seen_steps = set()
+
+    for recipe in recipes:
+        for ing in recipe.get('ingredients') or []:
+            key = _norm(ing.get('name'))
+            if key and key not in seen_ingredients:
+                seen_ingredients.add(key)
+                ingredients.append(ing)
+        for step in sorted(recipe.get('steps') or [], key=lambda s: s.get('order') or 0):
+            key = _norm(step.get('description'))
+            if key and key not in seen_steps:
+                seen_steps.add(key)
+                steps.append({'order': len(steps) + 1, 'description': step.get('description')})
+
+    merged['ingredients'] = ingredients
+    merged['steps'] = steps
+    merged['is_recipe'] = True
+    return merged
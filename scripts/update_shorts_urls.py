@@ -1,98 +1,136 @@
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import os
-import sys
-import requests
-from dotenv import load_dotenv
-from supabase import create_client, Client
-import time
+import rate_limit
+from chef_lookup import resolve_chefs
+from clients import get_http_session, get_supabase
+from crawl_cache import ShortsCache
+from db_stream import batched, iter_rows
+from youtube_urls import extract_video_id, shorts_url
 
-load_dotenv('.env.local')
 
-SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
+class ShortsClassifier:
+    """Decides whether video IDs are Shorts with HEAD probes of /shorts/<id>.
 
-if not all([SUPABASE_URL, SUPABASE_KEY]):
-    print("Missing env vars")
-    sys.exit(1)
+    YouTube answers 200 for a Short and 303 (redirect to /watch) for a regular
+    video. Probes share one keep-alive connection pool, run concurrently
+    within the 'youtube' rate limit, and every definite verdict is cached on
+    disk so an ID is only ever probed once.
+    """
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    def __init__(self, workers=8, cache=None):
+        self.workers = workers
+        self.cache = cache or ShortsCache(enabled=False)
+        self.session = get_http_session(pool_size=workers)
+        self.probes = 0
+        self._lock = threading.Lock()
 
-def is_video_short(video_id):
-    """
-    Checks if a video ID is technically a Short by requesting the /shorts/ endpoint.
-    YouTube redirects /shorts/ID to /watch?v=ID if it's NOT a short (usually).
-    However, simple HTTP HEAD requests might get 303 See Other.
-    Let's try requests.head/get.
-    """
-    url = f"https://www.youtube.com/shorts/{video_id}"
-    try:
-        # We need to act like a browser to avoid instant blocks, though HEAD might suffice.
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        # Allow redirects=False to see the 303
-        r = requests.head(url, headers=headers, allow_redirects=False, timeout=5)
-        
-        # If it returns 200, it's likely a short.
-        # If it returns 303 (See Other) -> redirects to /watch -> Not a short.
+    def _head(self, video_id):
+        r = self.session.head(shorts_url(video_id), allow_redirects=False, timeout=5)
+        if r.status_code == 429 or r.status_code >= 500:
+            # Raise so the limiter backs off and retries
+            r.raise_for_status()
+        return r
+
+    def probe(self, video_id):
+        """True for a Short, False for a regular video, None if YouTube gave no clear answer."""
+        with self._lock:
+            self.probes += 1
+        try:
+            r = rate_limit.call('youtube', self._head, video_id)
+        except Exception as e:
+            print(f"Error checking {video_id}: {e}")
+            return None
         if r.status_code == 200:
             return True
-        elif r.status_code == 303:
+        if r.status_code in (301, 302, 303):
             return False
-        else:
-            # Fallback: check history if redirects=True (default behavior mimic)
-            # But allow_redirects=False is safer for logic.
-            # Some report that valid shorts allow /shorts/ access.
-            return False 
-    except Exception as e:
-        print(f"Error checking {video_id}: {e}")
-        return False
-
-def main():
-    print("Fetching recipes...")
-    # Fetch all recipes that contain 'youtube.com/watch' (candidates for update)
-    # Limiting to Chef Jung Ho-young for speed if possible, or just all.
-    # Let's do all, but process in chunks if needed.
-    
-    chef_res = supabase.table('chefs').select('id').ilike('name', '%강레오%').execute()
-    if not chef_res.data:
-        print("Chef Kang not found")
+        return None
+
+    def classify(self, video_ids):
+        """Returns {video_id: is_short}; IDs without a clear answer are left out."""
+        verdicts = self.cache.get_many(video_ids)
+        pending = [v for v in dict.fromkeys(video_ids) if v not in verdicts]
+        if not pending:
+            return verdicts
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.probe, v): v for v in pending}
+            for future in as_completed(futures):
+                video_id = futures[future]
+                is_short = future.result()
+                if is_short is None:
+                    continue
+                verdicts[video_id] = is_short
+                self.cache.put(video_id, is_short)
+        return verdicts
+
+    def close(self):
+        self.cache.close()
+
+
+def fetch_candidates(chef_id):
+    """Recipes of a chef whose format the crawler's listing could not determine."""
+    rows = iter_rows('recipes', 'id, video_url', where=lambda q: q.eq('chef_id', chef_id).is_('is_short', 'null'), prefetch=True)
+    return (r for r in rows if r.get('video_url') and '/shorts/' not in r['video_url'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Classify recipes of unknown format and rewrite Shorts to /shorts/ URLs')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--chef', action='append', default=[], help='Chef UUID or name (repeatable)')
+    target.add_argument('--all', action='store_true', help='Check every chef')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent probes')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Recipes classified and written per round')
+    parser.add_argument('--dry-run', action='store_true', help='Classify without writing')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore and do not record cached verdicts')
+    args = parser.parse_args(argv)
+
+    chefs = resolve_chefs(args.chef, args.all)
+    if not chefs:
+        print("Chef not found")
         return
-        
-    jung_id = chef_res.data[0]['id']
-    print(f"Targeting Chef Kang Leo ({jung_id})")
 
-    recipes = supabase.table('recipes').select('id, video_url').eq('chef_id', jung_id).execute()
-    
-    count = 0
+    scanned = 0
+    checked = 0
+    shorts = 0
+    unknown = 0
     updated = 0
-    
-    for r in recipes.data:
-        url = r['video_url']
-        if '/shorts/' in url:
-            continue
-            
-        # Extract ID
-        # standard: https://www.youtube.com/watch?v=ID
-        if 'v=' in url:
-            vid_id = url.split('v=')[1].split('&')[0]
-        elif 'youtu.be/' in url:
-            vid_id = url.split('youtu.be/')[1].split('?')[0]
-        else:
-            continue
-            
-        print(f"Checking {vid_id} ... ", end='', flush=True)
-        if is_video_short(vid_id):
-            print("IS SHORT! Updating...")
-            new_url = f"https://www.youtube.com/shorts/{vid_id}"
-            
-            supabase.table('recipes').update({'video_url': new_url}).eq('id', r['id']).execute()
-            updated += 1
-        else:
-            print("Not short.")
-            
-        count += 1
-        time.sleep(0.5) # Slight delay
-        
-    print(f"Done. Scanned {count}. Updated {updated}.")
+    classifier = ShortsClassifier(workers=args.workers, cache=ShortsCache(enabled=not args.no_cache))
+    try:
+        for chef in chefs:
+            print(f"Chef {chef['name']}: checking recipes of unknown format...")
+            # Classified and written one batch at a time; the keyset scan is not
+            # disturbed by the rows it has already updated
+            for candidates in batched(fetch_candidates(chef['id']), args.batch_size):
+                scanned += len(candidates)
+                by_video = {}
+                for r in candidates:
+                    video_id = extract_video_id(r['video_url'])
+                    if video_id:
+                        by_video.setdefault(video_id, []).append(r)
+
+                verdicts = classifier.classify(list(by_video))
+                checked += len(by_video)
+                shorts += sum(1 for is_short in verdicts.values() if is_short)
+                unknown += len(by_video) - len(verdicts)
+
+                # Non-Shorts keep their URL but get is_short = false, so they are not checked again
+                updates = [
+                    {'id': r['id'], 'video_url': shorts_url(video_id) if is_short else r['video_url'], 'is_short': is_short}
+                    for video_id, is_short in verdicts.items()
+                    for r in by_video[video_id]
+                ]
+                if updates and not args.dry_run:
+                    res = rate_limit.call('supabase', get_supabase().rpc('set_video_urls', {'updates': updates}).execute)
+                    updated += res.data or 0
+    finally:
+        classifier.close()
+
+    print(f"Checked {checked} videos ({classifier.probes} probed, {checked - classifier.probes} cached): "
+          f"{shorts} Shorts" + (f", {unknown} undecided" if unknown else ""))
+    print(f"Done. Scanned {scanned}. Updated {updated}." + (" (dry run)" if args.dry_run else ""))
 
 if __name__ == "__main__":
     main()
@@ -1,26 +1,14 @@
-
-import os
-import sys
-from dotenv import load_dotenv
-from supabase import create_client, Client
-
-load_dotenv('.env.local')
-
-SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from clients import get_supabase
 
 def main():
+    supabase = get_supabase()
     # Check ID rYhGipzmd20
     print("Checking recipe rYhGipzmd20 in DB...")
     
-    # We need to find the recipe with this video URL or ID.
     # Note: the ID provided in logs `rYhGipzmd20` is the YOUTUBE ID.
-    # The DB 'id' is a UUID.
-    # We must search by video_url containing this ID.
+    # The DB 'id' is a UUID; the YouTube ID is stored in the indexed video_id column.
     
-    res = supabase.table('recipes').select('id, title, video_url').ilike('video_url', '%rYhGipzmd20%').execute()
+    res = supabase.table('recipes').select('id, title, video_url').eq('video_id', 'rYhGipzmd20').execute()
     
     if not res.data:
         print("Recipe not found by video ID match.")
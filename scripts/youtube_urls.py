@@ -0,0 +1,20 @@
+import re
+
+# Matches the 11-character video ID in watch?v=, /shorts/, youtu.be/ and /embed/ URLs.
+_VIDEO_ID_RE = re.compile(r'(?:[?&]v=|/shorts/|youtu\.be/|/embed/)([A-Za-z0-9_-]{11})')
+
+
+def extract_video_id(url):
+    """Returns the YouTube video ID from any of the URL forms we store, or None."""
+    if not url:
+        return None
+    match = _VIDEO_ID_RE.search(url)
+    return match.group(1) if match else None
+
+
+def watch_url(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def shorts_url(video_id):
+    return f"https://www.youtube.com/shorts/{video_id}"
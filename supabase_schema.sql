@@ -19,19 +19,40 @@ create table recipes (
   carbs text,
   is_recommended boolean default false,
   video_url text not null,
+  video_id text, -- YouTube ID normalized from watch?v= and /shorts/ URLs
+  duration integer, -- seconds, from the channel listing
+  is_short boolean, -- null when the listing could not tell
+  created_at timestamp with time zone default timezone('utc'::text, now()) not null,
+  updated_at timestamp with time zone default timezone('utc'::text, now()) not null -- also moved by ingredient/step changes, see scripts/migration_recipe_documents.sql
+);
+
+create unique index recipes_video_id_key on recipes (video_id);
+create index recipes_chef_id_created_at_idx on recipes (chef_id, created_at desc);
+create index recipes_created_at_idx on recipes (created_at desc);
+create index recipes_updated_at_idx on recipes (updated_at, id);
+
+-- 3. Ingredient Catalog Table (one row per canonical ingredient)
+create table ingredient_catalog (
+  id uuid default gen_random_uuid() primary key,
+  name text not null unique, -- normalized by scripts/ingredient_catalog.py
+  purchase_link text not null,
   created_at timestamp with time zone default timezone('utc'::text, now()) not null
 );
 
--- 3. Ingredients Table
+-- 4. Ingredients Table
 create table ingredients (
   id uuid default gen_random_uuid() primary key,
   recipe_id uuid references recipes(id) on delete cascade not null,
   name text not null,
   amount text not null,
-  purchase_link text not null
+  purchase_link text not null,
+  catalog_id uuid references ingredient_catalog(id) on delete set null
 );
 
--- 4. Steps Table
+create index ingredients_recipe_id_idx on ingredients (recipe_id);
+create index ingredients_catalog_id_idx on ingredients (catalog_id);
+
+-- 5. Steps Table
 create table steps (
   id uuid default gen_random_uuid() primary key,
   recipe_id uuid references recipes(id) on delete cascade not null,
@@ -39,20 +60,25 @@ create table steps (
   description text not null
 );
 
+create index steps_recipe_id_step_order_idx on steps (recipe_id, step_order);
+
 -- Enable RLS (Row Level Security) - Optional but recommended
 alter table chefs enable row level security;
 alter table recipes enable row level security;
+alter table ingredient_catalog enable row level security;
 alter table ingredients enable row level security;
 alter table steps enable row level security;
 
 -- Policy: Allow read access to everyone
 create policy "Allow public read access" on chefs for select using (true);
 create policy "Allow public read access" on recipes for select using (true);
+create policy "Allow public read access" on ingredient_catalog for select using (true);
 create policy "Allow public read access" on ingredients for select using (true);
 create policy "Allow public read access" on steps for select using (true);
 
 -- Policy: Allow insert access to everyone (For seeding only, remove later in production!)
 create policy "Allow public insert access" on chefs for insert with check (true);
 create policy "Allow public insert access" on recipes for insert with check (true);
+create policy "Allow public insert access" on ingredient_catalog for insert with check (true);
 create policy "Allow public insert access" on ingredients for insert with check (true);
 create policy "Allow public insert access" on steps for insert with check (true);